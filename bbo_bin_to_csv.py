@@ -0,0 +1,56 @@
+"""
+BBO 二进制记录 → CSV 转换工具
+
+dual_scalper.py 在 BBO_RECORD_FORMAT = "bin" 时按天写 bbo_data/YYYY-MM-DD.bin,
+每条为定长小端记录 (与 BboDataRecorder.BIN_RECORD 一致, 无文件头)。
+本脚本把它转换成与 csv 模式相同列的文本文件, 便于用表格/pandas 查看。
+
+用法:
+    python3 bbo_bin_to_csv.py bbo_data/2026-02-09.bin            # → bbo_data/2026-02-09.csv
+    python3 bbo_bin_to_csv.py bbo_data/*.bin
+    python3 bbo_bin_to_csv.py bbo_data/2026-02-09.bin out.csv
+"""
+
+import os
+import struct
+import sys
+
+# 必须与 dual_scalper.BboDataRecorder.BIN_RECORD / HEADER 保持一致
+BIN_RECORD = struct.Struct("<dddffffd")
+HEADER = b"timestamp,bid,ask,bid_size,ask_size,spread_pct,zero_ms,mid_price\n"
+# f32 字段按 float32 有效位数输出, 避免 0.1 → 0.10000000149011612 这类噪声
+CSV_ROW = b"%.3f,%r,%r,%.7g,%.7g,%.6f,%.1f,%.2f\n"
+
+
+def convert(src: str, dst: str) -> int:
+    """Convert one .bin file to CSV; returns the number of records written."""
+    with open(src, "rb") as f:
+        data = f.read()
+    usable = len(data) - len(data) % BIN_RECORD.size
+    if usable != len(data):
+        # 进程被强杀时最后一条可能只写了一半, 丢弃
+        print(f"⚠️  {src}: 末尾 {len(data) - usable} 字节不完整, 已忽略")
+    rows = [CSV_ROW % row for row in BIN_RECORD.iter_unpack(memoryview(data)[:usable])]
+    with open(dst, "wb") as f:
+        f.write(HEADER)
+        f.write(b"".join(rows))
+    return len(rows)
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+    if len(argv) == 2 and not argv[1].endswith(".bin"):
+        jobs = [(argv[0], argv[1])]
+    else:
+        jobs = [(src, os.path.splitext(src)[0] + ".csv") for src in argv]
+
+    for src, dst in jobs:
+        n = convert(src, dst)
+        print(f"✅ {src} → {dst} ({n} 条)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
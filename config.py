@@ -1,4 +1,8 @@
+import math
 import os
+import threading
+from decimal import Decimal
+from functools import lru_cache
 
 # ─── API ───
 PARADEX_ENV = "MAINNET"
@@ -32,10 +36,8 @@ COIN_PRESETS = {
 
 # ─── 交易 ───
 DEFAULT_COIN = "ETH"                                       # 默认币种
-MARKET = COIN_PRESETS[DEFAULT_COIN]["market"]               # 自动设置
-ORDER_SIZE = COIN_PRESETS[DEFAULT_COIN]["order_size"]       # 自动设置
-MIN_ORDER_SIZE = COIN_PRESETS[DEFAULT_COIN]["min_order_size"]
-SIZE_DECIMALS = COIN_PRESETS[DEFAULT_COIN]["size_decimals"]
+# MARKET / ORDER_SIZE / MIN_ORDER_SIZE / SIZE_DECIMALS / BURST_MIN_DEPTH / SIZE_QUANT
+# 由当前币种预设派生, 首次访问时解析 (见文件末尾 __getattr__ / set_coin)
 MAX_SPREAD_PERCENT = 0.0005    # 价差阈值 (%)
 MAX_CYCLES = 500               # 最大循环次数 (开+平=1循环, 500循环=1000单)
 CYCLE_INTERVAL_SEC = 1.0       # 循环间隔 (秒)
@@ -47,8 +49,12 @@ LOG_LEVEL = "INFO"
 # ─── 安全 ───
 MAX_CONSECUTIVE_FAILURES = 5   # 连续失败几次后暂停
 EMERGENCY_STOP_FILE = "STOP"   # 创建此文件可紧急停止
+ORDER_BREAKER_FAILURES = 3     # 单账户连续下单失败几次后熔断 (暂停开仓, 平仓照常)
+ORDER_BREAKER_OPEN_SEC = 15    # 熔断持续多久后放行一次试探开仓 (秒)
 
 # ─── 账户组 (按顺序轮换, 当前组限额满后自动切下一组) ───
+# 私钥可留空, 改由环境变量或 SECRETS_FILE 提供 (见 get_secret / group_private_key):
+#   PARADEX_<组名>_L2_PRIVATE_KEY_LONG / PARADEX_<组名>_L2_PRIVATE_KEY_SHORT
 ACCOUNT_GROUPS = [
     {
         "name": "A",                       # 组名 (显示用)
@@ -78,16 +84,153 @@ MAX_HOLD_SECONDS = 600         # 持仓超时强平 (秒)
 
 # ─── 冲刺模式 (0差持续+深度厚时自动加速) ───
 BURST_ZERO_SPREAD_MS = 2000    # 0 差持续多久触发冲刺 (ms)
-BURST_MIN_DEPTH = COIN_PRESETS[DEFAULT_COIN]["burst_min_depth"]
 MAX_ROUNDS_PER_BURST = 5       # 每次冲刺最多连续几轮
 
 # ─── Telegram 通知 ───
-TG_BOT_TOKEN = ""              # @BotFather 获取
+TG_BOT_TOKEN = ""              # @BotFather 获取 (留空则读 get_secret("TG_BOT_TOKEN"))
 TG_CHAT_ID = ""                # @userinfobot 获取
 TG_NOTIFY_INTERVAL = 10        # 每几个循环推一次
 TG_ENABLED = True              # 总开关
+TG_BATCH_WINDOW_SEC = 1.0      # 合并窗口: 窗口内的多条消息合成一次发送 (秒)
+TG_MAX_BATCH_CHARS = 3500      # 单次发送最大字符数 (Telegram 上限 4096)
 
 # ─── BBO 数据记录 (离线分析用) ───
 BBO_RECORD_ENABLED = True      # 是否记录
 BBO_RECORD_DIR = "bbo_data"    # 存储目录
 BBO_RECORD_BUFFER_SIZE = 100   # 缓冲条数 (越大性能越好, 断电丢越多)
+BBO_RECORD_FLUSH_INTERVAL_SEC = 5.0  # 缓冲未满时最长多久也刷一次盘 (秒)
+BBO_RECORD_FSYNC_INTERVAL_SEC = 5.0  # 多久 fsync 一次 (秒, 0=从不); 断电最多丢这段时间的数据
+BBO_RECORD_FORMAT = "csv"      # "csv" 文本 / "bin" 定长二进制 (numpy.fromfile 直接读, 见 BboDataRecorder)
+
+# ─── 密钥文件 (KEY=VALUE 每行一条, # 开头为注释) ───
+SECRETS_FILE = os.path.expanduser("~/.paradex/secrets")
+
+# ─── 派生时长 (纳秒整数, 直接与 time.monotonic_ns() 比较) ───
+ENTRY_ZERO_SPREAD_NS = ENTRY_ZERO_SPREAD_MS * 1_000_000
+EXIT_ZERO_SPREAD_NS = ENTRY_ZERO_SPREAD_NS // 2     # 平仓只需开仓等待时间的一半
+BURST_ZERO_SPREAD_NS = BURST_ZERO_SPREAD_MS * 1_000_000
+MAX_HOLD_NS = MAX_HOLD_SECONDS * 1_000_000_000
+
+# ─── 参数校验 (导入时检查一次, 配置错误直接报错退出) ───
+if not 0 < DEPTH_SAFETY_FACTOR <= 1:
+    raise ValueError(f"DEPTH_SAFETY_FACTOR 必须在 (0, 1] 内: {DEPTH_SAFETY_FACTOR}")
+if ZERO_SPREAD_THRESHOLD < 0:
+    raise ValueError(f"ZERO_SPREAD_THRESHOLD 不能为负: {ZERO_SPREAD_THRESHOLD}")
+if BURST_ZERO_SPREAD_MS < ENTRY_ZERO_SPREAD_MS:
+    raise ValueError("BURST_ZERO_SPREAD_MS 不能小于 ENTRY_ZERO_SPREAD_MS")
+
+
+# ─── 币种派生参数 (PEP 562 懒加载) ───
+_DERIVED = {
+    "MARKET": "market",
+    "ORDER_SIZE": "order_size",
+    "MIN_ORDER_SIZE": "min_order_size",
+    "SIZE_DECIMALS": "size_decimals",
+    "BURST_MIN_DEPTH": "burst_min_depth",
+}
+# 由预设计算得到的派生量 (同样按币种缓存)
+_COMPUTED = {
+    "SIZE_QUANT": lambda preset: Decimal(1).scaleb(-preset["size_decimals"]),  # 下单量量化步长
+}
+_selected = {"coin": DEFAULT_COIN}
+_derived_cache = {}
+
+
+def set_coin(coin: str):
+    """切换当前币种, 清空派生参数缓存 (下次访问时重新解析)"""
+    if coin not in COIN_PRESETS:
+        raise ValueError(f"未知币种: {coin}")
+    _selected["coin"] = coin
+    _derived_cache.clear()
+    globals().update(make_predicates(coin))
+
+
+def get_coin() -> str:
+    return _selected["coin"]
+
+
+def make_predicates(coin: str = None) -> dict:
+    """为币种构建热路径判定闭包: 阈值/单量/精度在构建时绑定为闭包常量, 每 tick 无模块全局查找"""
+    preset = COIN_PRESETS[coin or _selected["coin"]]
+    zero_ratio = ZERO_SPREAD_THRESHOLD / 200     # spread% ≤ T ⇔ ask - bid ≤ T/200 × (ask + bid)
+    order_size = preset["order_size"]
+    min_size = preset["min_order_size"]
+    factor = 10 ** preset["size_decimals"]
+    safety = DEPTH_SAFETY_FACTOR
+    floor = math.floor
+
+    def zero_spread(bid: float, ask: float) -> bool:
+        return ask - bid <= zero_ratio * (ask + bid)
+
+    def safe_size(bid_size: float, ask_size: float) -> float:
+        thin = bid_size if bid_size < ask_size else ask_size
+        safe = thin * safety
+        if safe > order_size:
+            safe = order_size
+        if safe < min_size:
+            return 0
+        # 向下取整到下单精度, 避免被交易所拒绝
+        return floor(safe * factor) / factor
+
+    return {"zero_spread": zero_spread, "safe_size": safe_size}
+
+
+# zero_spread / safe_size: 当前币种的判定闭包 (set_coin 时重建)
+globals().update(make_predicates())
+
+
+def __getattr__(name: str):
+    try:
+        return _derived_cache[name]
+    except KeyError:
+        pass
+    preset = COIN_PRESETS[_selected["coin"]]
+    key = _DERIVED.get(name)
+    if key is not None:
+        value = preset[key]
+    elif name in _COMPUTED:
+        value = _COMPUTED[name](preset)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    _derived_cache[name] = value
+    return value
+
+
+# ─── 密钥懒加载 (首次使用时才读取, 不常驻模块命名空间) ───
+_secrets_lock = threading.Lock()
+_secrets_file_values = None
+
+
+def _load_secrets_file() -> dict:
+    """解析 SECRETS_FILE 一次并缓存; 文件不存在时返回空表"""
+    global _secrets_file_values
+    with _secrets_lock:
+        if _secrets_file_values is None:
+            values = {}
+            try:
+                with open(SECRETS_FILE, encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line or line.startswith("#") or "=" not in line:
+                            continue
+                        key, _, value = line.partition("=")
+                        values[key.strip()] = value.strip().strip("\"'")
+            except FileNotFoundError:
+                pass
+            _secrets_file_values = values
+        return _secrets_file_values
+
+
+@lru_cache(maxsize=None)
+def get_secret(name: str) -> str:
+    """按 环境变量 → SECRETS_FILE 顺序解析密钥, 都没有则返回空串"""
+    value = os.environ.get(name)
+    if value:
+        return value
+    return _load_secrets_file().get(name, "")
+
+
+def group_private_key(group: dict, side: str) -> str:
+    """账户组私钥: config 中填写的优先, 否则 get_secret("PARADEX_<组名>_L2_PRIVATE_KEY_<LONG|SHORT>")"""
+    return (group.get(f"l2_private_key_{side}")
+            or get_secret(f"PARADEX_{group.get('name', '')}_L2_PRIVATE_KEY_{side.upper()}"))
@@ -1,36 +1,64 @@
 import asyncio
+import atexit
+import bisect
+import functools
 import json
 import logging
-import math
+import queue
+import random
 import time
 import os
+import struct
 import sys
+import threading
+from array import array
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from decimal import Decimal
-from enum import Enum
-from typing import Optional, Dict, Any, List
+from logging.handlers import QueueHandler, QueueListener
+from enum import IntEnum
+from typing import Optional, Dict, List
 
+import config
 from config import (
     COIN_PRESETS, DEFAULT_COIN,
-    MARKET, ORDER_SIZE, MIN_ORDER_SIZE, SIZE_DECIMALS,
+    MARKET, ORDER_SIZE, MIN_ORDER_SIZE, SIZE_QUANT,
     MAX_CYCLES, PARADEX_ENV,
     MAX_CONSECUTIVE_FAILURES, EMERGENCY_STOP_FILE,
-    ACCOUNT_GROUPS, RATE_LIMITS_FILE,
+    ORDER_BREAKER_FAILURES, ORDER_BREAKER_OPEN_SEC,
+    ACCOUNT_GROUPS, RATE_LIMITS_FILE, get_secret, group_private_key,
     ZERO_SPREAD_THRESHOLD, ENTRY_ZERO_SPREAD_MS, DEPTH_SAFETY_FACTOR,
-    MAX_HOLD_SECONDS,
+    MAX_HOLD_SECONDS, ENTRY_ZERO_SPREAD_NS, EXIT_ZERO_SPREAD_NS, BURST_ZERO_SPREAD_NS,
+    MAX_HOLD_NS,
     BURST_ZERO_SPREAD_MS, BURST_MIN_DEPTH,
     MAX_ROUNDS_PER_BURST,
     TG_BOT_TOKEN, TG_CHAT_ID, TG_NOTIFY_INTERVAL, TG_ENABLED,
+    TG_BATCH_WINDOW_SEC, TG_MAX_BATCH_CHARS,
     BBO_RECORD_ENABLED, BBO_RECORD_DIR, BBO_RECORD_BUFFER_SIZE,
+    BBO_RECORD_FLUSH_INTERVAL_SEC, BBO_RECORD_FSYNC_INTERVAL_SEC,
+    BBO_RECORD_FORMAT,
 )
 
 # Runtime overrides (set by select_coin → apply_coin_preset)
 COIN_SYMBOL = DEFAULT_COIN
 
+import httpx
 from paradex_py import ParadexSubkey
 from paradex_py.api.ws_client import ParadexWebsocketChannel
 from paradex_py.common.order import Order, OrderType, OrderSide
 
+# orjson 可选 (C 实现, 编解码更快); 未安装时回退标准库 json
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
 
 # ─── Logging ───
 LOG_FILE = "dual_scalper.log"
@@ -43,10 +71,16 @@ console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.WARNING)
 console_handler.setFormatter(logging.Formatter('%(message)s'))
 
+# 日志经队列交给后台线程写文件/终端, 事件循环 (WS 回调) 只做一次入队
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, file_handler, console_handler,
+                             respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+logger.addHandler(QueueHandler(log_queue))
 
 logging.getLogger('websockets').setLevel(logging.WARNING)
 logging.getLogger('paradex_py').setLevel(logging.WARNING)
@@ -57,107 +91,266 @@ MAX_ORDERS_PER_MINUTE = 30
 MAX_ORDERS_PER_HALF_HOUR = 300
 MAX_ORDERS_PER_DAY = 1000
 
+# BBO 超过此时长未更新视为过期 (monotonic ns)
+BBO_STALE_NS = 1_000_000_000
+
+# 阻塞 SDK 调用按用途分池, 慢的余额请求不会占住下单线程 (TG 走异步 httpx, 不占线程)
+# (下单池 2 账户 × 2 并发; 下单/账户池在启动时 prewarm_pool 预先建好线程)
+ORDER_POOL_WORKERS = 4
+ACCOUNT_IO_POOL_WORKERS = 2
+ORDER_POOL = ThreadPoolExecutor(max_workers=ORDER_POOL_WORKERS, thread_name_prefix="order")
+ACCOUNT_IO_POOL = ThreadPoolExecutor(max_workers=ACCOUNT_IO_POOL_WORKERS, thread_name_prefix="acct-io")
+
+
+def prewarm_pool(pool: ThreadPoolExecutor, workers: int):
+    """Spawn all of a pool's worker threads now, so the first orders don't pay
+    thread creation. The barrier keeps every task busy until all have started,
+    forcing the executor to create one thread per task."""
+    barrier = threading.Barrier(workers)
+    for future in [pool.submit(barrier.wait, 1.0) for _ in range(workers)]:
+        future.exception()
+
+# SDK REST 连接池: httpx 默认空闲 5s 即断开, 下单间隔一长每单都要重新 TLS 握手
+HTTP_LIMITS = httpx.Limits(max_connections=8, max_keepalive_connections=4,
+                           keepalive_expiry=300)
+
+# 平仓重试: 相邻两次重试之间的退避基数 (秒), 每次再乘 0.5~1.5 的随机抖动; 重试次数 = 间隔数 + 1
+CLOSE_RETRY_DELAYS = (0.1, 0.2)
+CLOSE_RETRY_ATTEMPTS = len(CLOSE_RETRY_DELAYS) + 1
+
+# 主循环节拍: 交易状态机 / 后台维护 (token, 余额) / 面板重绘最小间隔 (最高 4 Hz, 人眼看不出差别)
+TRADING_TICK_SEC = 0.05
+IDLE_TICK_SEC = 0.2    # IDLE 且无 0 差时的最长休眠; 0 差临近入场时由 MarketObserver.wake 提前唤醒
+HOUSEKEEPING_INTERVAL_SEC = 0.5
+TOKEN_CHECK_INTERVAL_SEC = 10.0   # 多久检查一次 Token 年龄 (240s 刷新, 有效期 ~300s, 留足余量)
+DISPLAY_MIN_INTERVAL_SEC = 0.25
+DISPLAY_MAX_IDLE_SEC = 1.0     # 没有新行情时, 面板至少每隔多久刷新一次 (WS 延迟 / 运行时长)
+
+# 余额后台刷新的最小间隔 (秒): 平仓后不再同步等待, 而是节流后丢到后台
+BALANCE_MIN_INTERVAL_SEC = 5.0
+BALANCE_DRAIN_TIMEOUT_SEC = 3.0   # 退出时最多等进行中的后台刷新多久, 超时则不再等, 直接重新读取
+
+# 退出时每个网络阶段 (余额+WS 关闭 / TG 最终报告) 的最长等待 (秒)
+SHUTDOWN_STEP_TIMEOUT_SEC = 5.0
+
+# 方向表: current_direction → (A 开仓方向, B 开仓方向, 日志文字) / 平仓方向 / 下一轮方向
+_OPEN_SIDES = {"A_LONG": ("BUY", "SELL", "A多B空"),
+               "A_SHORT": ("SELL", "BUY", "A空B多")}
+_CLOSE_SIDES = {"A_LONG": ("SELL", "BUY"),     # A 平多, B 平空
+                "A_SHORT": ("BUY", "SELL")}    # A 平空, B 平多
+_NEXT_DIR = {"A_LONG": "A_SHORT", "A_SHORT": "A_LONG"}
+_REVERSE = {"BUY": "SELL", "SELL": "BUY"}
+_ORDER_SIDES = {"BUY": OrderSide.Buy, "SELL": OrderSide.Sell}
+
 
 # ─── Rate Persistence ───
 class RatePersistence:
     """Persists per-account order timestamps to JSON file. Survives restarts."""
 
+    # 每单只追加一行日志; 每 COMPACT_RECORDS 单或 COMPACT_INTERVAL_SEC 秒才重写快照并截断日志
+    COMPACT_RECORDS = 256
+    COMPACT_INTERVAL_SEC = 60.0
+    SEQ_KEY = "_seq"   # 快照中记录已并入的最大日志序号 (地址键都是 0x..., 不会冲突)
+
     def __init__(self, filepath: str = RATE_LIMITS_FILE):
         self.filepath = filepath
+        self.journal_path = filepath + ".jrnl"
+        self._seq = 0   # 最近一条日志行的序号, 跨重启递增 (由 _load 恢复)
         self._data: Dict[str, List[float]] = self._load()
+        # O_APPEND: 截断后的写入总是落在文件末尾
+        self._journal = open(self.journal_path, "ab", buffering=0)
+        self._journal_records = 0
+        self._last_compact = 0.0
+        # 启动时把旧日志并入快照, 之后日志只含本次运行的新记录
+        self.compact()
 
     def _load(self) -> Dict[str, List[float]]:
-        """Load from disk, clean expired entries (>24h)."""
-        if not os.path.exists(self.filepath):
-            return {}
-        try:
-            with open(self.filepath, "r") as f:
-                raw = json.load(f)
-            now = time.time()
-            cleaned = {}
-            for addr, timestamps in raw.items():
-                valid = [t for t in timestamps if now - t < 86400]
-                if valid:
-                    cleaned[addr] = valid
-            return cleaned
-        except Exception as e:
-            logger.warning(f"速率文件加载失败, 将重新创建: {e}")
-            return {}
-
-    def _save(self):
+        """Load snapshot + journal from disk, clean expired entries (>24h)."""
+        raw: Dict[str, List[float]] = {}
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "rb") as f:
+                    raw = json_loads(f.read())
+            except Exception as e:
+                logger.warning(f"速率文件加载失败, 将重新创建: {e}")
+                raw = {}
+        snap_seq = raw.pop(self.SEQ_KEY, 0)
+        last_seq = snap_seq
+        if os.path.exists(self.journal_path):
+            try:
+                with open(self.journal_path, "rb") as f:
+                    for line in f:
+                        try:
+                            addr, ts, *rest = json_loads(line)
+                        except (ValueError, TypeError):
+                            continue   # 崩溃时写了一半的行
+                        if rest:
+                            seq = rest[0]
+                            if seq <= snap_seq:
+                                continue   # 已在快照中 (快照写成后、日志截断前崩溃), 不重复计数
+                            if seq > last_seq:
+                                last_seq = seq
+                        raw.setdefault(addr, []).append(ts)
+            except OSError as e:
+                logger.warning(f"速率日志读取失败: {e}")
+        self._seq = last_seq
+        now = time.time()
+        cleaned = {}
+        for addr, timestamps in raw.items():
+            valid = sorted(t for t in timestamps if now - t < 86400)
+            if valid:
+                cleaned[addr] = valid
+        return cleaned
+
+    def _save(self) -> bool:
         """Atomic write: write to .tmp then rename."""
         tmp = self.filepath + ".tmp"
         try:
-            with open(tmp, "w") as f:
-                json.dump(self._data, f)
+            with open(tmp, "wb") as f:
+                f.write(json_dumps({**self._data, self.SEQ_KEY: self._seq}))
             os.replace(tmp, self.filepath)
+            return True
         except Exception as e:
             logger.error(f"速率文件保存失败: {e}")
+            return False
 
-    def get_orders(self, l2_address: str) -> List[float]:
-        """Get valid (non-expired) timestamps for an account."""
-        now = time.time()
-        timestamps = self._data.get(l2_address, [])
-        valid = [t for t in timestamps if now - t < 86400]
-        self._data[l2_address] = valid
-        return valid
+    def get_orders(self, l2_address: str, now: Optional[float] = None) -> List[float]:
+        """Get valid (non-expired) timestamps for an account (ascending)."""
+        timestamps = self._data.get(l2_address, ())
+        i_day = bisect.bisect_right(timestamps, (time.time() if now is None else now) - 86400)
+        return list(timestamps[i_day:])
+
+    def _prune(self, now: float):
+        """Drop entries older than 24h (timestamps are ascending: one slice per account)."""
+        cutoff = now - 86400
+        for addr in list(self._data):
+            timestamps = self._data[addr]
+            expired = bisect.bisect_right(timestamps, cutoff)
+            if expired == len(timestamps):
+                del self._data[addr]
+            elif expired:
+                del timestamps[:expired]
+
+    def _windows(self, l2_address: str, now: float) -> tuple[List[float], int, int, int]:
+        """(timestamps, 24h / 30min / 1min 窗口起点); 未清理的过期记录落在 24h 起点之前"""
+        timestamps = self._data.get(l2_address, ())
+        i_day = bisect.bisect_right(timestamps, now - 86400)
+        i_half = bisect.bisect_right(timestamps, now - 1800, i_day)
+        i_min = bisect.bisect_right(timestamps, now - 60, i_half)
+        return timestamps, i_day, i_half, i_min
 
     def record(self, l2_address: str, timestamp: float):
-        """Append a new order timestamp and persist to disk."""
+        """Append a new order timestamp and persist it as one journal line."""
         if l2_address not in self._data:
             self._data[l2_address] = []
         self._data[l2_address].append(timestamp)
-        self._save()
+        self._seq += 1
+        try:
+            self._journal.write(json_dumps([l2_address, timestamp, self._seq]) + b"\n")
+        except Exception as e:
+            logger.error(f"速率日志写入失败: {e}")
+        self._journal_records += 1
+        self._maybe_compact()
+
+    def record_batch(self, entries: List[tuple[str, float]]):
+        """Append several (address, timestamp) records with a single journal write."""
+        data = self._data
+        seq = self._seq
+        lines = []
+        for l2_address, timestamp in entries:
+            data.setdefault(l2_address, []).append(timestamp)
+            seq += 1
+            lines.append(json_dumps([l2_address, timestamp, seq]) + b"\n")
+        self._seq = seq
+        try:
+            self._journal.write(b"".join(lines))
+        except Exception as e:
+            logger.error(f"速率日志写入失败: {e}")
+        self._journal_records += len(entries)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if (self._journal_records >= self.COMPACT_RECORDS
+                or time.monotonic() - self._last_compact >= self.COMPACT_INTERVAL_SEC):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the full snapshot, then truncate the journal it now contains."""
+        self._journal_records = 0
+        self._last_compact = time.monotonic()
+        self._prune(time.time())
+        if not self._save():
+            return   # 快照没写成, 保留日志
+        try:
+            self._journal.truncate(0)
+        except Exception as e:
+            logger.error(f"速率日志截断失败: {e}")
+
+    def close(self):
+        """Final compaction on shutdown; the journal is left empty."""
+        if self._journal.closed:
+            return
+        self.compact()
+        self._journal.close()
 
     def can_trade(self, l2_address: str) -> tuple[bool, float, str]:
         """Check if an account can trade based on persisted history."""
         now = time.time()
-        timestamps = self.get_orders(l2_address)
-
-        minute_orders = [t for t in timestamps if now - t < 60]
-        half_hour_orders = [t for t in timestamps if now - t < 1800]
-        day_orders = timestamps  # already cleaned to <24h
-
-        if len(minute_orders) >= MAX_ORDERS_PER_MINUTE:
-            return False, 60 - (now - minute_orders[0]), "分钟"
-        if len(half_hour_orders) >= MAX_ORDERS_PER_HALF_HOUR:
-            return False, 1800 - (now - half_hour_orders[0]), "30分钟"
-        if len(day_orders) >= MAX_ORDERS_PER_DAY:
-            return False, 86400 - (now - day_orders[0]), "24h"
+        timestamps, i_day, i_half, i_min = self._windows(l2_address, now)
+        n = len(timestamps)
+
+        if n - i_min >= MAX_ORDERS_PER_MINUTE:
+            return False, 60 - (now - timestamps[i_min]), "分钟"
+        if n - i_half >= MAX_ORDERS_PER_HALF_HOUR:
+            return False, 1800 - (now - timestamps[i_half]), "30分钟"
+        if n - i_day >= MAX_ORDERS_PER_DAY:
+            return False, 86400 - (now - timestamps[i_day]), "24h"
         return True, 0, ""
 
     def get_counts(self, l2_address: str) -> tuple[int, int, int]:
         """Returns (minute_count, half_hour_count, day_count) for display."""
+        timestamps, i_day, i_half, i_min = self._windows(l2_address, time.time())
+        n = len(timestamps)
+        return n - i_min, n - i_half, n - i_day
+
+    def get_counts_bulk(self, addresses: List[str]) -> dict[str, tuple[int, int, int]]:
+        """get_counts() for several accounts against one shared timestamp."""
         now = time.time()
-        timestamps = self.get_orders(l2_address)
-        minute = sum(1 for t in timestamps if now - t < 60)
-        half_hour = sum(1 for t in timestamps if now - t < 1800)
-        day = len(timestamps)
-        return minute, half_hour, day
+        counts = {}
+        for address in addresses:
+            timestamps, i_day, i_half, i_min = self._windows(address, now)
+            n = len(timestamps)
+            counts[address] = (n - i_min, n - i_half, n - i_day)
+        return counts
+
+    @staticmethod
+    def counts_ok(counts: tuple[int, int, int]) -> bool:
+        """True if (minute, half-hour, day) counts are all below their limits (same rule as can_trade)."""
+        m, h, d = counts
+        return m < MAX_ORDERS_PER_MINUTE and h < MAX_ORDERS_PER_HALF_HOUR and d < MAX_ORDERS_PER_DAY
 
     def earliest_unlock(self, l2_address: str) -> float:
         """Returns seconds until the earliest rate limit unlocks for this account."""
         now = time.time()
-        timestamps = self.get_orders(l2_address)
+        timestamps, i_day, i_half, i_min = self._windows(l2_address, now)
+        n = len(timestamps)
 
         waits = []
-        minute_orders = [t for t in timestamps if now - t < 60]
-        half_hour_orders = [t for t in timestamps if now - t < 1800]
-
-        if len(minute_orders) >= MAX_ORDERS_PER_MINUTE:
-            waits.append(60 - (now - minute_orders[0]))
-        if len(half_hour_orders) >= MAX_ORDERS_PER_HALF_HOUR:
-            waits.append(1800 - (now - half_hour_orders[0]))
-        if len(timestamps) >= MAX_ORDERS_PER_DAY:
-            waits.append(86400 - (now - timestamps[0]))
+        if n - i_min >= MAX_ORDERS_PER_MINUTE:
+            waits.append(60 - (now - timestamps[i_min]))
+        if n - i_half >= MAX_ORDERS_PER_HALF_HOUR:
+            waits.append(1800 - (now - timestamps[i_half]))
+        if n - i_day >= MAX_ORDERS_PER_DAY:
+            waits.append(86400 - (now - timestamps[i_day]))
 
         return min(waits) if waits else 0
 
 
 # ─── State ───
-class StrategyState(Enum):
-    IDLE = "IDLE"
-    HOLDING = "HOLDING"
+class StrategyState(IntEnum):
+    # IntEnum: 状态机每 tick 的比较走 int.__eq__ (显示用 .name)
+    IDLE = 0
+    HOLDING = 1
 
 
 # ─── Rate Limiter ───
@@ -171,59 +364,123 @@ class RateLimiter:
         self.per_day = per_day
         self.l2_address = l2_address
         self.persistence = persistence
-        self.minute_orders: deque = deque()
-        self.half_hour_orders: deque = deque()
-        self.day_orders: deque = deque()
+        self.ts = array("d")   # 升序下单时间戳 (time.time(), 与持久化文件共享, 不能用单调时钟)
+        self._day_start = 0     # 上次算出的 24h 窗口起点 (下次二分的下界)
+        self._last_now = 0.0
 
         # Restore history from persistence file on startup
         if persistence and l2_address:
             self._restore_from_persistence()
 
     def _restore_from_persistence(self):
-        """Load historical timestamps from persistence into deques."""
+        """Load historical timestamps from persistence into the array."""
         timestamps = self.persistence.get_orders(self.l2_address)
-        now = time.time()
-        for t in timestamps:
-            age = now - t
-            if age < 86400:
-                self.day_orders.append(t)
-            if age < 1800:
-                self.half_hour_orders.append(t)
-            if age < 60:
-                self.minute_orders.append(t)
+        self.ts = array("d", sorted(timestamps))
+        self._day_start = 0
         if timestamps:
-            logger.info(f"[{self.l2_address[:10]}...] 恢复历史下单记录: "
-                        f"{len(self.minute_orders)}m/{len(self.half_hour_orders)}h/{len(self.day_orders)}d")
-
-    def can_place_order(self) -> tuple[bool, float, str]:
-        now = time.time()
-        while self.minute_orders and now - self.minute_orders[0] > 60:
-            self.minute_orders.popleft()
-        while self.half_hour_orders and now - self.half_hour_orders[0] > 1800:
-            self.half_hour_orders.popleft()
-        while self.day_orders and now - self.day_orders[0] > 86400:
-            self.day_orders.popleft()
-
-        if len(self.minute_orders) >= self.per_minute:
-            return False, 60 - (now - self.minute_orders[0]), "分钟"
-        if len(self.half_hour_orders) >= self.per_half_hour:
-            return False, 1800 - (now - self.half_hour_orders[0]), "30分钟"
-        if len(self.day_orders) >= self.per_day:
-            return False, 86400 - (now - self.day_orders[0]), "24h"
+            m, h, d = self.get_counts()
+            logger.info(f"[{self.l2_address[:10]}...] 恢复历史下单记录: {m}m/{h}h/{d}d")
+
+    def _window_starts(self, now: float) -> tuple[int, int, int]:
+        """Index of the first timestamp inside each window (minute, 30min, day)."""
+        ts = self.ts
+        # 时间前进时窗口起点只会右移, 从上次的位置继续二分; 时钟回拨则从头找
+        lo = self._day_start if now >= self._last_now else 0
+        self._last_now = now
+        i_day = bisect.bisect_left(ts, now - 86400, lo)
+        i_half = bisect.bisect_left(ts, now - 1800, i_day)
+        i_min = bisect.bisect_left(ts, now - 60, i_half)
+        # 过期记录累积到上限两倍时整体压缩一次
+        if i_day > self.per_day * 2:
+            del ts[:i_day]
+            self._day_start = 0
+            return 0, i_half - i_day, i_min - i_day
+        self._day_start = i_day
+        return i_day, i_half, i_min
+
+    def can_place_order(self, now: Optional[float] = None) -> tuple[bool, float, str]:
+        if now is None:
+            now = time.time()
+        ts = self.ts
+        i_day, i_half, i_min = self._window_starts(now)
+        n = len(ts)
+
+        if n - i_min >= self.per_minute:
+            return False, 60 - (now - ts[i_min]), "分钟"
+        if n - i_half >= self.per_half_hour:
+            return False, 1800 - (now - ts[i_half]), "30分钟"
+        if n - i_day >= self.per_day:
+            return False, 86400 - (now - ts[i_day]), "24h"
         return True, 0, ""
 
-    def record_order(self):
-        now = time.time()
-        self.minute_orders.append(now)
-        self.half_hour_orders.append(now)
-        self.day_orders.append(now)
+    def record_order(self, now: Optional[float] = None):
+        if now is None:
+            now = time.time()
+        self.ts.append(now)
         # Persist to disk
         if self.persistence and self.l2_address:
             self.persistence.record(self.l2_address, now)
 
-    def get_counts(self) -> tuple[int, int, int]:
+    @staticmethod
+    def record_pair(a: "RateLimiter", b: "RateLimiter", now: Optional[float] = None):
+        """Record one order on each limiter; a shared persistence gets one journal write."""
+        if now is None:
+            now = time.time()
+        if a.persistence is None or a.persistence is not b.persistence:
+            a.record_order(now)
+            b.record_order(now)
+            return
+        a.ts.append(now)
+        b.ts.append(now)
+        a.persistence.record_batch(
+            [(lim.l2_address, now) for lim in (a, b) if lim.l2_address])
+
+    def get_counts(self, now: Optional[float] = None) -> tuple[int, int, int]:
         """Returns (minute_count, half_hour_count, day_count)."""
-        return len(self.minute_orders), len(self.half_hour_orders), len(self.day_orders)
+        i_day, i_half, i_min = self._window_starts(time.time() if now is None else now)
+        n = len(self.ts)
+        return n - i_min, n - i_half, n - i_day
+
+
+# ─── Circuit Breaker ───
+class CircuitBreaker:
+    """Per-account order breaker: CLOSED → OPEN after repeated failures → HALF_OPEN probe."""
+
+    # 只拦开仓; 平仓始终执行, 不会因熔断留下单边持仓
+    CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+    def __init__(self, name: str, failure_threshold: int = ORDER_BREAKER_FAILURES,
+                 open_seconds: float = ORDER_BREAKER_OPEN_SEC):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: float = 0.0
+
+    def allow(self) -> bool:
+        """True if a new entry may be attempted (OPEN turns HALF_OPEN once the cool-down passes)."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            logger.info("[%s] 熔断冷却结束, 试探下单", self.name)
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("[%s] 下单恢复, 熔断关闭", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("[%s] 连续下单失败 %d 次, 熔断 %.0fs (暂停开仓)",
+                               self.name, self.failures, self.open_seconds)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
 
 
 # ─── Latency Tracker ───
@@ -232,13 +489,43 @@ class LatencyTracker:
 
     def __init__(self, max_records: int = 5):
         self.recent_latencies: deque = deque(maxlen=max_records)
-        self.current_ws_latency: float = 0.0
+        self.ws_age_ns: int = 0       # 最新 BBO 距今 (monotonic ns); 只在读取时换算为 ms
+        self._sum: float = 0.0
+        self._recent_text: str = "-"
+        self._seq: int = 0            # 下一个样本的序号
+        self._min_q: deque = deque()  # 值单调递增, 队首为窗口最小值
+        self._max_q: deque = deque()  # 值单调递减, 队首为窗口最大值
 
     def record_cycle_latency(self, latency_ms: float):
-        self.recent_latencies.append(latency_ms)
+        recent = self.recent_latencies
+        if len(recent) == recent.maxlen:
+            self._sum -= recent[0]
+        recent.append(latency_ms)
+        self._sum += latency_ms
+        self._recent_text = "/".join([f"{lat:.0f}" for lat in recent])
+
+        seq = self._seq
+        self._seq = seq + 1
+        oldest = seq - recent.maxlen    # 序号 ≤ oldest 的样本已滑出窗口
+        min_q, max_q = self._min_q, self._max_q
+        while min_q and min_q[-1][1] >= latency_ms:
+            min_q.pop()
+        min_q.append((seq, latency_ms))
+        if min_q[0][0] <= oldest:
+            min_q.popleft()
+        while max_q and max_q[-1][1] <= latency_ms:
+            max_q.pop()
+        max_q.append((seq, latency_ms))
+        if max_q[0][0] <= oldest:
+            max_q.popleft()
+
+    def update_ws_age(self, age_ns: int):
+        self.ws_age_ns = age_ns
 
-    def update_ws_latency(self, latency_ms: float):
-        self.current_ws_latency = latency_ms
+    @property
+    def current_ws_latency(self) -> float:
+        """WS data age in ms (display units)."""
+        return self.ws_age_ns / 1_000_000
 
     def get_stats(self) -> dict:
         if not self.recent_latencies:
@@ -246,90 +533,190 @@ class LatencyTracker:
         latencies = list(self.recent_latencies)
         return {
             "recent": latencies,
-            "avg": sum(latencies) / len(latencies),
-            "min": min(latencies),
-            "max": max(latencies),
+            "avg": self._sum / len(latencies),
+            "min": self._min_q[0][1],
+            "max": self._max_q[0][1],
             "ws": self.current_ws_latency,
         }
 
     def format_recent(self) -> str:
-        if not self.recent_latencies:
-            return "-"
-        return "/".join([f"{lat:.0f}" for lat in self.recent_latencies])
+        return self._recent_text
+
+
+# ─── Emergency Stop File ───
+class StopFileWatcher:
+    """Background watcher for the emergency STOP file; hot path reads a cached bool."""
+
+    def __init__(self, path: str, interval: float = 0.5):
+        self.path = path
+        self.interval = interval
+        self._stop_requested = os.path.exists(path)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop_requested
+
+    def start(self):
+        """Start background task to check the file. Non-blocking."""
+        if self._task is None and not self._stop_requested:
+            self._task = asyncio.create_task(self._watch_loop())
+
+    def stop(self):
+        """Cancel the background task."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    async def _watch_loop(self):
+        """Background loop: one stat() per interval, exits once the file appears."""
+        while True:
+            try:
+                await asyncio.sleep(self.interval)
+                if os.path.exists(self.path):
+                    self._stop_requested = True
+                    logger.info(f"检测到紧急停止文件 {self.path}")
+                    return
+            except asyncio.CancelledError:
+                return
+
+
+# ─── Telegram 消息模板 (str.format, 每条通知一次格式化) ───
+_TMPL_STARTUP = (
+    "🚀 <b>Paradex 双账户对冲套利已启动</b>\n"
+    "\n"
+    "📊 市场: {market} | 最大单量: {order_size} {coin} (动态){group_text}\n"
+    "🚦 限速: {per_min}/分 | {per_half}/30分 | {per_day}/日 (每账户)\n"
+    "💰 Long 余额: ${bal_a:.4f}\n"
+    "💰 Short 余额: ${bal_b:.4f}\n"
+    "💰 合计: ${total:.4f}\n"
+    "\n"
+    "📡 发送 /stop 可远程停止脚本\n"
+)
+_TMPL_PROGRESS = (
+    "📊 <b>进度报告 — 第 {cycle} 轮</b>\n"
+    "\n"
+    "🔄 成交笔数: {fills} 笔 (每轮4笔)\n"
+    "📈 累计交易量: ${volume:,.0f}\n"
+    "{pnl_emoji} 合计盈亏: ${pnl_total:+.4f}\n"
+    "📊 每万收益: ${per_10k:.4f}\n"
+    "\n"
+    "🅰️ A: PnL ${pnl_a:+.4f} | 30m: {half_a}/{per_half} | 24h: {day_a}/{per_day}\n"
+    "🅱️ B: PnL ${pnl_b:+.4f} | 30m: {half_b}/{per_half} | 24h: {day_b}/{per_day}\n"
+    "⏰ 运行: {elapsed_min:.1f} 分钟\n"
+)
+_TMPL_BURST = (
+    "🔥 <b>冲刺模式触发!</b>\n"
+    "\n"
+    "⏱️ 0差持续: {zero_ms:.0f}ms\n"
+    "📈 深度: 买 {bid_size:.4f} | 卖 {ask_size:.4f}\n"
+    "🚀 开始高频循环 (最多 {max_rounds} 轮)\n"
+)
+_TMPL_ERROR = (
+    "⚠️ <b>策略异常停止!</b>\n"
+    "\n"
+    "❌ 原因: {reason}\n"
+    "🔄 已完成循环: {cycles}\n"
+    "💵 合计盈亏: ${pnl_total:+.4f}\n"
+    "📈 交易量: ${volume:,.0f}\n"
+)
+_TMPL_SHUTDOWN = (
+    "{result_emoji} <b>策略运行结束</b>\n"
+    "\n"
+    "🔄 总循环: {cycle} | 成交笔数: {fills}\n"
+    "📈 总交易量: ${volume:,.0f}\n"
+    "💵 合计盈亏: ${pnl_total:+.4f} USDC\n"
+    "📊 每万收益: ${per_10k:.4f}\n"
+    "\n"
+    "🅰️ A: ${init_a:.2f} → ${cur_a:.2f} ({pnl_a:+.4f})\n"
+    "🅱️ B: ${init_b:.2f} → ${cur_b:.2f} ({pnl_b:+.4f})\n"
+    "⏰ 运行时长: {elapsed_min:.1f} 分钟\n"
+)
 
 
 # ─── Telegram Notifier ───
 class TelegramNotifier:
     """Async Telegram alerts + background /stop command listener."""
 
-    def __init__(self, bot_token: str, chat_id: str, enabled: bool = True):
+    LONG_POLL_SEC = 25   # getUpdates 长轮询时长: 有指令立即返回, 空闲时每 25s 一个请求
+
+    def __init__(self, bot_token: str, chat_id: str, enabled: bool = True,
+                 batch_window: float = TG_BATCH_WINDOW_SEC,
+                 max_batch_chars: int = TG_MAX_BATCH_CHARS):
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.enabled = enabled and bool(bot_token) and bool(chat_id)
+        self.batch_window = batch_window
+        self.max_batch_chars = max_batch_chars
+        self._pending: list = []   # str, 或 (模板, 字段) 待 flush 时再格式化
+        self._pending_keys: dict[str, int] = {}   # key → _pending 下标 (同类只保留最新)
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+        self._http: Optional[httpx.AsyncClient] = None
         self._stop_requested = False
         self._last_update_id = 0
         self._poll_task: Optional[asyncio.Task] = None
         self._poll_failures = 0
         if self.enabled:
             logger.info("Telegram 通知已启用")
-            self._init_update_offset()
         else:
             logger.info("Telegram 通知未启用 (未配置 Token/ChatID 或已关闭)")
 
-    def _init_update_offset(self):
-        """Delete webhook (fixes 409) and skip stale updates on startup."""
-        import urllib.request
-        import json
+    def _api_url(self, method: str) -> str:
+        return f"https://api.telegram.org/bot{self.bot_token}/{method}"
+
+    async def _init_update_offset(self):
+        """Delete webhook (fixes 409) and skip stale updates; runs when polling starts."""
+        client = self._client()
 
         # Step 1: Delete any existing webhook to avoid 409 conflict
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/deleteWebhook"
-            req = urllib.request.Request(url)
-            urllib.request.urlopen(req, timeout=5)
+            await client.get(self._api_url("deleteWebhook"), timeout=5)
             logger.info("TG webhook cleared")
         except Exception:
             pass
 
         # Step 2: Skip all pending updates
         try:
-            url = (f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
-                   f"?offset=-1&limit=1&timeout=0")
-            req = urllib.request.Request(url)
-            resp = urllib.request.urlopen(req, timeout=5)
-            data = json.loads(resp.read().decode("utf-8"))
+            resp = await client.get(self._api_url("getUpdates"),
+                                    params={"offset": -1, "limit": 1, "timeout": 0}, timeout=5)
+            data = json_loads(resp.content)
             if data.get("ok") and data.get("result"):
                 self._last_update_id = data["result"][-1]["update_id"] + 1
         except Exception as e:
             logger.debug(f"TG init offset failed (non-critical): {e}")
 
-    def _send_sync(self, text: str):
-        """Blocking send (runs in thread pool)."""
-        import urllib.request
-        import json
-
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        payload = json.dumps({
-            "chat_id": self.chat_id,
-            "text": text,
-            "parse_mode": "HTML",
-        }).encode("utf-8")
+    def _client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first send (inside the running loop)."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=10,
+                # 一条连接常驻长轮询, 一条给发送 (发送在 _send_lock 下串行)
+                limits=httpx.Limits(max_connections=2, keepalive_expiry=300),
+            )
+        return self._http
 
-        req = urllib.request.Request(
-            url, data=payload,
+    async def _post_message(self, text: str):
+        """POST sendMessage over the shared client; raises on HTTP errors."""
+        resp = await self._client().post(
+            self._api_url("sendMessage"),
+            content=json_dumps({"chat_id": self.chat_id, "text": text, "parse_mode": "HTML"}),
             headers={"Content-Type": "application/json"},
         )
-        urllib.request.urlopen(req, timeout=10)
+        resp.raise_for_status()
 
-    def _poll_commands_sync(self) -> list[str]:
-        """Blocking poll for new commands. Short timeout to minimize blocking."""
-        import urllib.request
-        import json
+    async def _poll_commands(self) -> list[str]:
+        """Long-poll for new commands over the shared client.
 
-        url = (f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
-               f"?offset={self._last_update_id}&limit=10&timeout=0")
-        req = urllib.request.Request(url)
-        resp = urllib.request.urlopen(req, timeout=3)
-        data = json.loads(resp.read().decode("utf-8"))
+        Telegram holds the request open up to LONG_POLL_SEC and answers as
+        soon as an update arrives; the client-side timeout leaves headroom.
+        """
+        resp = await self._client().get(
+            self._api_url("getUpdates"),
+            params={"offset": self._last_update_id, "limit": 10, "timeout": self.LONG_POLL_SEC},
+            timeout=self.LONG_POLL_SEC + 5,
+        )
+        resp.raise_for_status()
+        data = json_loads(resp.content)
 
         commands = []
         if data.get("ok"):
@@ -358,16 +745,26 @@ class TelegramNotifier:
             self._poll_task.cancel()
 
     async def _poll_loop(self):
-        """Background loop: polls TG every 5s, backs off on repeated failures."""
-        poll_interval = 5
+        """Background loop: back-to-back long polls, backs off only on failures."""
+        backoff = 0
         max_interval = 60
 
+        try:
+            await self._init_update_offset()
+        except asyncio.CancelledError:
+            return
+
         while True:
             try:
-                await asyncio.sleep(poll_interval)
-                commands = await asyncio.to_thread(self._poll_commands_sync)
+                if backoff:
+                    await asyncio.sleep(backoff)
+                started = time.monotonic()
+                commands = await self._poll_commands()
                 self._poll_failures = 0
-                poll_interval = 5  # Reset on success
+                backoff = 0  # Reset on success
+                # 正常情况下空结果要等满 LONG_POLL_SEC 才返回; 立即返回说明服务端没在长轮询, 防止空转
+                if not commands and time.monotonic() - started < 1:
+                    await asyncio.sleep(1)
 
                 for cmd in commands:
                     if cmd.startswith("/stop"):
@@ -382,86 +779,127 @@ class TelegramNotifier:
                 return
             except Exception as e:
                 self._poll_failures += 1
-                # Exponential backoff: 5 → 10 → 20 → 40 → 60 (cap)
-                poll_interval = min(5 * (2 ** self._poll_failures), max_interval)
+                # Exponential backoff: 10 → 20 → 40 → 60 (cap)
+                backoff = min(5 * (2 ** self._poll_failures), max_interval)
                 if self._poll_failures <= 3:
-                    logger.debug(f"TG poll failed ({e}), retry in {poll_interval}s")
+                    logger.debug(f"TG poll failed ({e}), retry in {backoff}s")
                 elif self._poll_failures == 4:
                     logger.warning(f"TG poll 连续失败 {self._poll_failures} 次, "
-                                   f"降频至 {poll_interval}s 轮询")
+                                   f"降频至 {backoff}s 重试")
 
-    async def send(self, text: str):
-        """Async send, swallows exceptions."""
-        if not self.enabled:
-            return
-        try:
-            await asyncio.to_thread(self._send_sync, text)
-        except Exception as e:
-            logger.error(f"TG 发送失败: {e}")
+    async def send(self, text: str, key: Optional[str] = None):
+        """Queue a message; the background flusher posts the batch. Never blocks.
+
+        With a key, a message of the same key still waiting in the queue is
+        replaced by this one instead of being sent twice.
+        """
+        if self.enabled:
+            self._enqueue(text, key)
+
+    def send_template(self, template: str, fields: dict, key: Optional[str] = None):
+        """Like send(), but template.format_map(fields) runs in the flusher, off the
+        trading path. fields must already hold plain values (a snapshot)."""
+        if self.enabled:
+            self._enqueue((template, fields), key)
+
+    def _enqueue(self, item, key: Optional[str]):
+        if key is not None:
+            idx = self._pending_keys.get(key)
+            if idx is not None:
+                self._pending[idx] = item
+                return
+            self._pending_keys[key] = len(self._pending)
+        self._pending.append(item)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_after(self.batch_window))
+
+    async def _flush_after(self, delay: float):
+        # 发送期间新入队的消息 (_enqueue 见本任务未结束不会另起任务) 由本循环继续发出
+        while True:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                return
+            await self.flush()
+            if not self._pending:
+                return
+
+    def _split_batches(self, messages: list[str]) -> list[str]:
+        """Join messages with blank lines, starting a new batch before max_batch_chars."""
+        batches, current, size = [], [], 0
+        for msg in messages:
+            extra = len(msg) + (2 if current else 0)
+            if current and size + extra > self.max_batch_chars:
+                batches.append("\n\n".join(current))
+                current, size, extra = [], 0, len(msg)
+            current.append(msg)
+            size += extra
+        if current:
+            batches.append("\n\n".join(current))
+        return batches
+
+    async def flush(self):
+        """Post everything queued now (also called on shutdown). Swallows exceptions."""
+        async with self._send_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            self._pending_keys.clear()
+            messages = [m if isinstance(m, str) else m[0].format_map(m[1]) for m in pending]
+            for text in self._split_batches(messages):
+                try:
+                    await self._post_message(text)
+                except Exception as e:
+                    logger.error(f"TG 发送失败: {e}")
+
+    async def close(self):
+        """Flush queued messages and close the HTTP client."""
+        await self.flush()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
     async def notify_startup(self, bal_a: float, bal_b: float,
                              group_name: str = "", total_groups: int = 1):
         """策略启动通知"""
         group_text = f" | 组: {group_name} ({total_groups}组)" if group_name else ""
-        msg = (
-            "🚀 <b>Paradex 双账户对冲套利已启动</b>\n"
-            "\n"
-            f"📊 市场: {MARKET} | 最大单量: {ORDER_SIZE} {COIN_SYMBOL} (动态){group_text}\n"
-            f"🚦 限速: {MAX_ORDERS_PER_MINUTE}/分 | {MAX_ORDERS_PER_HALF_HOUR}/30分 | {MAX_ORDERS_PER_DAY}/日 (每账户)\n"
-            f"💰 Long 余额: ${bal_a:.4f}\n"
-            f"💰 Short 余额: ${bal_b:.4f}\n"
-            f"💰 合计: ${bal_a + bal_b:.4f}\n"
-            "\n"
-            f"📡 发送 /stop 可远程停止脚本\n"
+        msg = _TMPL_STARTUP.format(
+            market=MARKET, order_size=ORDER_SIZE, coin=COIN_SYMBOL, group_text=group_text,
+            per_min=MAX_ORDERS_PER_MINUTE, per_half=MAX_ORDERS_PER_HALF_HOUR,
+            per_day=MAX_ORDERS_PER_DAY, bal_a=bal_a, bal_b=bal_b, total=bal_a + bal_b,
         )
         await self.send(msg)
 
     async def notify_progress(self, cycle: int, stats: dict,
                               account_a: 'AccountTrader', account_b: 'AccountTrader',
                               elapsed_min: float):
-        """周期性进度报告"""
+        """周期性进度报告 (交易路径上只取快照, 格式化在发送时进行)"""
+        if not self.enabled:
+            return
         pnl_a = account_a.get_pnl()
         pnl_b = account_b.get_pnl()
         _, half_a, day_a = account_a.rate_limiter.get_counts()
         _, half_b, day_b = account_b.rate_limiter.get_counts()
 
-        pnl_emoji = "📈" if stats['pnl_total'] >= 0 else "📉"
-
-        msg = (
-            f"📊 <b>进度报告 — 第 {cycle} 轮</b>\n"
-            "\n"
-            f"🔄 成交笔数: {cycle * 4} 笔 (每轮4笔)\n"
-            f"📈 累计交易量: ${stats['volume']:,.0f}\n"
-            f"{pnl_emoji} 合计盈亏: ${stats['pnl_total']:+.4f}\n"
-            f"📊 每万收益: ${stats['per_10k']:.4f}\n"
-            "\n"
-            f"🅰️ A: PnL ${pnl_a:+.4f} | 30m: {half_a}/{MAX_ORDERS_PER_HALF_HOUR} | 24h: {day_a}/{MAX_ORDERS_PER_DAY}\n"
-            f"🅱️ B: PnL ${pnl_b:+.4f} | 30m: {half_b}/{MAX_ORDERS_PER_HALF_HOUR} | 24h: {day_b}/{MAX_ORDERS_PER_DAY}\n"
-            f"⏰ 运行: {elapsed_min:.1f} 分钟\n"
-        )
-        await self.send(msg)
+        self.send_template(_TMPL_PROGRESS, dict(
+            cycle=cycle, fills=cycle * 4, volume=stats['volume'],
+            pnl_emoji="📈" if stats['pnl_total'] >= 0 else "📉",
+            pnl_total=stats['pnl_total'], per_10k=stats['per_10k'],
+            pnl_a=pnl_a, half_a=half_a, day_a=day_a,
+            pnl_b=pnl_b, half_b=half_b, day_b=day_b,
+            per_half=MAX_ORDERS_PER_HALF_HOUR, per_day=MAX_ORDERS_PER_DAY,
+            elapsed_min=elapsed_min,
+        ), key="progress")
 
     async def notify_burst(self, zero_ms: float, bid_size: float, ask_size: float):
         """冲刺模式触发通知"""
-        msg = (
-            "🔥 <b>冲刺模式触发!</b>\n"
-            "\n"
-            f"⏱️ 0差持续: {zero_ms:.0f}ms\n"
-            f"📈 深度: 买 {bid_size:.4f} | 卖 {ask_size:.4f}\n"
-            f"🚀 开始高频循环 (最多 {MAX_ROUNDS_PER_BURST} 轮)\n"
-        )
-        await self.send(msg)
+        self.send_template(_TMPL_BURST, dict(zero_ms=zero_ms, bid_size=bid_size, ask_size=ask_size,
+                                             max_rounds=MAX_ROUNDS_PER_BURST), key="burst")
 
     async def notify_error(self, reason: str, stats: dict):
         """异常/停止通知"""
-        msg = (
-            "⚠️ <b>策略异常停止!</b>\n"
-            "\n"
-            f"❌ 原因: {reason}\n"
-            f"🔄 已完成循环: {stats['cycles']}\n"
-            f"💵 合计盈亏: ${stats['pnl_total']:+.4f}\n"
-            f"📈 交易量: ${stats['volume']:,.0f}\n"
-        )
+        msg = _TMPL_ERROR.format(reason=reason, cycles=stats['cycles'],
+                                 pnl_total=stats['pnl_total'], volume=stats['volume'])
         await self.send(msg)
 
     async def notify_shutdown(self, cycle: int, stats: dict,
@@ -470,21 +908,13 @@ class TelegramNotifier:
         """策略结束最终报告"""
         pnl_a = account_a.get_pnl()
         pnl_b = account_b.get_pnl()
-        result_emoji = "✅" if stats['pnl_total'] >= 0 else "⚠️"
-
-        msg = (
-            f"{result_emoji} <b>策略运行结束</b>\n"
-            "\n"
-            f"🔄 总循环: {cycle} | 成交笔数: {cycle * 4}\n"
-            f"📈 总交易量: ${stats['volume']:,.0f}\n"
-            f"💵 合计盈亏: ${stats['pnl_total']:+.4f} USDC\n"
-            f"📊 每万收益: ${stats['per_10k']:.4f}\n"
-            "\n"
-            f"🅰️ A: ${account_a.initial_balance:.2f} → ${account_a.current_balance:.2f} "
-            f"({pnl_a:+.4f})\n"
-            f"🅱️ B: ${account_b.initial_balance:.2f} → ${account_b.current_balance:.2f} "
-            f"({pnl_b:+.4f})\n"
-            f"⏰ 运行时长: {elapsed_min:.1f} 分钟\n"
+        msg = _TMPL_SHUTDOWN.format(
+            result_emoji="✅" if stats['pnl_total'] >= 0 else "⚠️",
+            cycle=cycle, fills=cycle * 4, volume=stats['volume'],
+            pnl_total=stats['pnl_total'], per_10k=stats['per_10k'],
+            init_a=account_a.initial_balance, cur_a=account_a.current_balance, pnl_a=pnl_a,
+            init_b=account_b.initial_balance, cur_b=account_b.current_balance, pnl_b=pnl_b,
+            elapsed_min=elapsed_min,
         )
         await self.send(msg)
 
@@ -493,19 +923,54 @@ class TelegramNotifier:
 class BboDataRecorder:
     """Writes BBO snapshots to daily CSV files for offline analysis."""
 
-    HEADER = "timestamp,bid,ask,bid_size,ask_size,spread_pct,zero_ms,mid_price\n"
-
-    def __init__(self, data_dir: str, buffer_size: int, enabled: bool):
+    HEADER = b"timestamp,bid,ask,bid_size,ask_size,spread_pct,zero_ms,mid_price\n"
+    OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+    # timestamp/bid/ask/mid_price 用 f64 保留价格精度, 其余 f32
+    BIN_RECORD = struct.Struct("<dddffffd")
+    # CSV 行模板: bytes % 在 C 里一次完成格式化, 无需 str → bytes 编码
+    # (%a 输出 float 的 repr, 与原先 f"{bid}" 写出的值完全一致)
+    CSV_ROW = b"%.3f,%a,%a,%a,%a,%.6f,%.1f,%.2f\n"
+    MAX_PENDING_BATCHES = 64   # 写线程积压上限 (批), 超出则丢弃新批次
+    # fmt="bin" 的日文件可直接 numpy.fromfile(path, dtype=BIN_DTYPE) 读取; bbo_bin_to_csv.py 转回 CSV
+    BIN_DTYPE = [("timestamp", "<f8"), ("bid", "<f8"), ("ask", "<f8"),
+                 ("bid_size", "<f4"), ("ask_size", "<f4"), ("spread_pct", "<f4"),
+                 ("zero_ms", "<f4"), ("mid_price", "<f8")]
+
+    def __init__(self, data_dir: str, buffer_size: int, enabled: bool,
+                 flush_interval: float = BBO_RECORD_FLUSH_INTERVAL_SEC,
+                 fsync_interval: float = BBO_RECORD_FSYNC_INTERVAL_SEC,
+                 fmt: str = BBO_RECORD_FORMAT):
+        if fmt not in ("csv", "bin"):
+            raise ValueError(f"未知 BBO 记录格式: {fmt}")
+        self.fmt = fmt
+        self._pack = self.BIN_RECORD.pack if fmt == "bin" else None
         self.data_dir = data_dir
         self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
         self.enabled = enabled
         self.current_date: str = ""
-        self.file = None
-        self.buffer: list[str] = []
+        # current_date 对应的本地日期区间 [day_start, day_end); now 落在区间内时无需 strftime
+        self._day_start: float = 0.0
+        self._day_end: float = 0.0
+        self.rows: list = []           # 待写入的原始行 (未编码)
         self.total_records: int = 0
+        self.dropped_records: int = 0
+        self.last_flush: float = time.time()   # 从创建时起算, 首条记录不会立刻触发刷盘
+        # 积压 = 已提交 - 已完成; 两个计数各由一个线程写, 无需加锁
+        self._batches_submitted: int = 0
+        self._batches_done: int = 0
+        # 以下仅由写线程访问
+        self.fd: int = -1
+        self.file_date: str = ""
+        self.last_fsync: float = time.monotonic()
+        self._writer: Optional[ThreadPoolExecutor] = None
 
         if self.enabled:
             os.makedirs(data_dir, exist_ok=True)
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bbo-writer")
+            # 异常退出时也刷出尾部缓冲
+            atexit.register(self.close)
             logger.info(f"BBO 数据记录已启用 → {data_dir}/")
 
     def record(self, now: float, bid: float, ask: float,
@@ -515,68 +980,166 @@ class BboDataRecorder:
         if not self.enabled:
             return
 
-        # 按日切分文件
-        date_str = time.strftime("%Y-%m-%d", time.localtime(now))
-        if date_str != self.current_date:
-            self._rotate_file(date_str)
+        # 按日切分文件: 只在跨过本地零点 (或时钟回拨) 时才重新取日期, 先把旧日期的缓冲交给写线程
+        if not self._day_start <= now < self._day_end:
+            date_str = self._set_day(now)
+            if date_str != self.current_date:
+                self._flush()
+                self.current_date = date_str
 
-        self.buffer.append(
-            f"{now:.3f},{bid},{ask},{bid_size},{ask_size},"
-            f"{spread_pct:.6f},{zero_ms:.1f},{mid_price:.2f}\n"
-        )
+        rows = self.rows
+        rows.append((now, bid, ask, bid_size, ask_size, spread_pct, zero_ms, mid_price))
         self.total_records += 1
 
-        if len(self.buffer) >= self.buffer_size:
+        if (len(rows) >= self.buffer_size
+                or now - self.last_flush >= self.flush_interval):
             self._flush()
 
+    def flush_if_stale(self):
+        """行情停滞 / 断线时由后台定时调用: 缓冲超过 flush_interval 未刷则交给写线程"""
+        if self.rows and time.time() - self.last_flush >= self.flush_interval:
+            self._flush()
+
+    def _set_day(self, now: float) -> str:
+        """计算 now 所在本地日期及其 [零点, 次日零点) 区间 (mktime 处理夏令时)"""
+        lt = time.localtime(now)
+        self._day_start = time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, 0, 0, 0, 0, 0, -1))
+        self._day_end = time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+        return time.strftime("%Y-%m-%d", lt)
+
+    def _flush(self):
+        """把缓冲交给写线程 (不等待磁盘, 也不在这里编码)"""
+        self.last_flush = time.time()
+        if self.rows and self._writer:
+            rows, self.rows = self.rows, []
+            if self._batches_submitted - self._batches_done >= self.MAX_PENDING_BATCHES:
+                # 磁盘跟不上: 丢掉这一批, 不让内存无限增长
+                if not self.dropped_records:
+                    logger.warning("BBO 写入积压, 开始丢弃记录 (磁盘过慢?)")
+                self.dropped_records += len(rows)
+                return
+            self._batches_submitted += 1
+            self._writer.submit(self._write_batch, self.current_date, rows)
+
+    def _write_batch(self, date_str: str, rows: list):
+        """写线程: 写一批并计入已完成"""
+        try:
+            self._write(date_str, rows)
+        finally:
+            self._batches_done += 1
+
+    def _encode(self, rows: list) -> bytes:
+        """写线程: 整批编码为 CSV 行或定长二进制记录"""
+        if self._pack:
+            pack = self._pack
+            return b"".join([pack(*row) for row in rows])
+        row_fmt = self.CSV_ROW
+        return b"".join([row_fmt % row for row in rows])
+
+    def _write(self, date_str: str, rows: list):
+        """写线程: 编码, 按需切换日期文件, 一次 os.write (O_APPEND 保证追加)"""
+        try:
+            data = self._encode(rows)
+            if date_str != self.file_date:
+                self._rotate_file(date_str)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self.fd, view):]
+            view.release()
+            self._maybe_fsync()
+        except Exception as e:
+            logger.error(f"BBO 数据写入失败: {e}")
+
     def _rotate_file(self, date_str: str):
         """切换到新日期的文件"""
-        self._flush()
-        if self.file:
-            self.file.close()
-
-        filepath = os.path.join(self.data_dir, f"{date_str}.csv")
-        is_new = not os.path.exists(filepath)
-        self.file = open(filepath, "a", encoding="utf-8")
-        if is_new:
-            self.file.write(self.HEADER)
-        self.current_date = date_str
+        if self.fd >= 0:
+            self._maybe_fsync(force=True)
+            os.close(self.fd)
+
+        filepath = os.path.join(self.data_dir, f"{date_str}.{self.fmt}")
+        self.fd = os.open(filepath, self.OPEN_FLAGS, 0o644)
+        if not self._pack and os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, self.HEADER)
+        self.file_date = date_str
         logger.info(f"BBO 数据文件切换: {filepath}")
 
-    def _flush(self):
-        """把缓冲写入磁盘"""
-        if self.buffer and self.file:
-            self.file.writelines(self.buffer)
-            self.file.flush()
-            self.buffer.clear()
+    def _maybe_fsync(self, force: bool = False):
+        """按 fsync_interval 节流落盘, 让页缓存合并多次写入"""
+        if self.fsync_interval <= 0 and not force:
+            return
+        mono = time.monotonic()
+        if force or mono - self.last_fsync >= self.fsync_interval:
+            os.fsync(self.fd)
+            self.last_fsync = mono
 
     def close(self):
-        """关闭文件, 刷出剩余缓冲"""
-        self._flush()
-        if self.file:
-            self.file.close()
-            self.file = None
+        """等写线程排空, 刷出剩余缓冲并关闭文件"""
+        if self._writer is None:
+            return
+        self._writer.shutdown(wait=True)
+        self._writer = None
+        # 写线程已退出, 剩余缓冲直接在当前线程写入
+        if self.rows:
+            self._write(self.current_date, self.rows)
+            self.rows = []
+        if self.fd >= 0:
+            self._maybe_fsync(force=True)
+            os.close(self.fd)
+            self.fd = -1
+        if self.dropped_records:
+            logger.warning(f"BBO 记录因写入积压共丢弃 {self.dropped_records} 条")
 
 
 # ─── Market Observer ───
+@dataclass(frozen=True, slots=True)
+class BboSnapshot:
+    """Immutable copy of the latest BBO (display / notification formatting)."""
+    bid: float
+    ask: float
+    bid_size: float
+    ask_size: float
+    is_zero: bool
+    mid_price: float
+    last_update_ns: int
+
+
 class MarketObserver:
     """Real-time BBO monitor: spread tracking, zero-gap timing, burst detection."""
 
-    def __init__(self):
-        self.current_bbo: Dict[str, Any] = {
-            "bid": 0.0, "ask": 0.0,
-            "bid_size": 0.0, "ask_size": 0.0,
-            "spread": 100.0, "mid_price": 0.0,
-            "last_update": 0,
-        }
+    __slots__ = (
+        "bid", "ask", "bid_size", "ask_size", "is_zero", "mid_price", "last_update_ns",
+        "zero_spread_start_ns", "zero_spread_duration_ns", "mode",
+        "zero_spread", "safe_size", "burst_zero_ns", "burst_min_depth", "recorder",
+        "wake", "wake_ns",
+    )
 
-        # 0 点差追踪
-        self.zero_spread_start: float = 0       # 本次 0 点差开始的 time.time()
-        self.zero_spread_duration_ms: float = 0  # 当前 0 点差已持续毫秒数
+    def __init__(self):
+        # 最新 BBO
+        self.bid: float = 0.0
+        self.ask: float = 0.0
+        self.bid_size: float = 0.0
+        self.ask_size: float = 0.0
+        self.is_zero: bool = False
+        self.mid_price: float = 0.0
+        self.last_update_ns: int = 0
+
+        # 0 点差追踪 (monotonic ns 整数)
+        self.zero_spread_start_ns: int = 0      # 本次 0 点差开始的 time.monotonic_ns()
+        self.zero_spread_duration_ns: int = 0   # 当前 0 点差已持续纳秒数
 
         # 模式
         self.mode: str = "normal"   # "normal" 或 "burst"
 
+        # 热路径判定 (当前币种的闭包, 阈值已在 config.make_predicates 中绑定)
+        self.zero_spread = config.zero_spread
+        self.safe_size = config.safe_size
+        self.burst_zero_ns: int = BURST_ZERO_SPREAD_NS
+        self.burst_min_depth: float = BURST_MIN_DEPTH   # 币种预设已在构造前应用
+
+        # 0 差持续到入场时长的 1/4 时唤醒处于长休眠的交易循环
+        self.wake = asyncio.Event()
+        self.wake_ns: int = max(ENTRY_ZERO_SPREAD_NS // 4, 1)
+
         # BBO 数据记录器
         self.recorder = BboDataRecorder(
             data_dir=BBO_RECORD_DIR,
@@ -586,112 +1149,145 @@ class MarketObserver:
 
     async def on_bbo_update(self, channel, message):
         """WebSocket BBO callback — updates spread, zero-gap timer, burst mode."""
+        # 快路径: 直接下标取值, 只有畸形帧才走异常分支
         try:
-            data = message.get("params", {}).get("data", {})
-            if not data:
-                return
-
-            bid = float(data.get("bid", 0))
-            ask = float(data.get("ask", 0))
-            bid_size = float(data.get("bid_size", 0))
-            ask_size = float(data.get("ask_size", 0))
-
-            if bid <= 0 or ask <= 0:
-                return
+            data = message["params"]["data"]
+            bid = float(data["bid"])
+            ask = float(data["ask"])
+            bid_size = float(data["bid_size"])
+            ask_size = float(data["ask_size"])
+        except (KeyError, TypeError):
+            return  # 非 BBO 数据帧 / 字段缺失
+        except ValueError as e:
+            logger.error("BBO 解析错误: %s", e)
+            return
 
-            mid = (bid + ask) / 2
-            spread_pct = round((ask - bid) / mid * 100, 6)
-            now = time.time()
+        if bid <= 0 or ask <= 0:
+            return
 
-            self.current_bbo = {
-                "bid": bid, "ask": ask,
-                "bid_size": bid_size, "ask_size": ask_size,
-                "spread": spread_pct, "mid_price": mid,
-                "last_update": now,
-            }
-
-            # 追踪 0 点差持续时间 (≤ 阈值视为 0)
-            if spread_pct <= ZERO_SPREAD_THRESHOLD:
-                if self.zero_spread_start == 0:
-                    self.zero_spread_start = now
-                self.zero_spread_duration_ms = (now - self.zero_spread_start) * 1000
-            else:
-                self.zero_spread_start = 0
-                self.zero_spread_duration_ms = 0
+        mid = (bid + ask) * 0.5
+        is_zero = self.zero_spread(bid, ask)
+        now_ns = time.monotonic_ns()
+
+        self.bid = bid
+        self.ask = ask
+        self.bid_size = bid_size
+        self.ask_size = ask_size
+        self.is_zero = is_zero
+        self.mid_price = mid
+        self.last_update_ns = now_ns
+
+        # 追踪 0 点差持续时间 (≤ 阈值视为 0)
+        if is_zero:
+            if self.zero_spread_start_ns == 0:
+                self.zero_spread_start_ns = now_ns
+            self.zero_spread_duration_ns = now_ns - self.zero_spread_start_ns
+            if self.zero_spread_duration_ns >= self.wake_ns:
+                self.wake.set()
+        else:
+            self.zero_spread_start_ns = 0
+            self.zero_spread_duration_ns = 0
 
-            # 记录 BBO 数据 (用于离线分析, 在 0 差计算之后)
+        # 记录 BBO 数据 (用于离线分析, 在 0 差计算之后)
+        if self.recorder.enabled:
+            # spread_pct 不再 round: CSV 按 %.6f 输出, 二进制存 f32, 结果一致
             self.recorder.record(
-                now, bid, ask, bid_size, ask_size,
-                spread_pct, self.zero_spread_duration_ms, mid,
+                time.time(), bid, ask, bid_size, ask_size,
+                (ask - bid) / mid * 100.0,
+                self.zero_spread_duration_ns / 1_000_000, mid,
             )
 
-            # 检测冲刺模式
-            self._detect_burst_mode()
-
-        except Exception as e:
-            logger.error(f"BBO 解析错误: {e}")
-
-    def _detect_burst_mode(self):
-        """Enter burst mode when zero-gap persists and depth is thick on both sides."""
-        bbo = self.current_bbo
-
-        if (self.zero_spread_duration_ms >= BURST_ZERO_SPREAD_MS
-                and bbo["bid_size"] >= BURST_MIN_DEPTH
-                and bbo["ask_size"] >= BURST_MIN_DEPTH):
+        # 冲刺模式: 0 差持续 + 两边深度都厚 (绝大多数 tick 在第一个比较就短路)
+        if (self.zero_spread_duration_ns >= self.burst_zero_ns
+                and bid_size >= self.burst_min_depth
+                and ask_size >= self.burst_min_depth):
             if self.mode != "burst":
-                logger.info(
-                    f"🔥 进入冲刺模式! 0差持续 {self.zero_spread_duration_ms:.0f}ms, "
-                    f"深度 买:{bbo['bid_size']:.4f} 卖:{bbo['ask_size']:.4f}"
-                )
-            self.mode = "burst"
-        else:
-            if self.mode == "burst":
-                logger.info("📉 退出冲刺模式")
+                logger.info("🔥 进入冲刺模式! 0差持续 %.0fms, 深度 买:%.4f 卖:%.4f",
+                            self.zero_spread_duration_ms, bid_size, ask_size)
+                self.mode = "burst"
+        elif self.mode == "burst":
+            logger.info("📉 退出冲刺模式")
             self.mode = "normal"
 
-    def is_spread_ready(self, min_ms: float) -> bool:
-        """True if spread ≤ threshold for at least min_ms (ignores depth)."""
-        bbo = self.current_bbo
+    @property
+    def zero_spread_duration_ms(self) -> float:
+        """Zero-gap duration in ms (display / notification units)."""
+        return self.zero_spread_duration_ns / 1_000_000
 
+    def is_spread_ready(self, min_ns: int, now_ns: Optional[int] = None) -> bool:
+        """True if spread ≤ threshold for at least min_ns (ignores depth).
+
+        now_ns: caller's time.monotonic_ns(), so one decision reads the clock once.
+        """
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
         # 数据不能太旧 (>1s 视为过期)
-        if time.time() - bbo["last_update"] > 1.0:
+        if now_ns - self.last_update_ns > BBO_STALE_NS:
             return False
 
         # 必须 0 点差 (≤ 阈值)
-        if bbo["spread"] > ZERO_SPREAD_THRESHOLD:
+        if not self.is_zero:
             return False
 
-        # 0 点差持续 >= min_ms
-        if self.zero_spread_duration_ms < min_ms:
+        # 0 点差持续 >= min_ns
+        if self.zero_spread_duration_ns < min_ns:
             return False
 
         return True
 
-    def calc_safe_size(self) -> float:
-        """Dynamic order size = min(ORDER_SIZE, thin_side × safety_factor). Returns 0 if below minimum."""
-        bbo = self.current_bbo
+    def spread_pct(self) -> float:
+        """Current spread in percent of mid (computed on demand for display)."""
+        mid = self.mid_price
+        if mid <= 0:
+            return 100.0
+        return (self.ask - self.bid) / mid * 100
 
-        if time.time() - bbo["last_update"] > 1.0:
+    def calc_safe_size(self, now_ns: Optional[int] = None) -> float:
+        """Dynamic order size = min(ORDER_SIZE, thin_side × safety_factor). Returns 0 if below minimum."""
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        if now_ns - self.last_update_ns > BBO_STALE_NS:
             return 0
 
-        thin_side = min(bbo["bid_size"], bbo["ask_size"])
-        safe = min(ORDER_SIZE, thin_side * DEPTH_SAFETY_FACTOR)
+        return self.safe_size(self.bid_size, self.ask_size)
 
-        if safe < MIN_ORDER_SIZE:
-            return 0
+    def can_fill_close(self, size: float, now_ns: Optional[int] = None) -> bool:
+        """True if both sides have enough depth to fill a close order of given size."""
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        if now_ns - self.last_update_ns > BBO_STALE_NS:
+            return False
+        return self.bid_size >= size and self.ask_size >= size
 
-        # 向下取整到下单精度, 避免被交易所拒绝
-        factor = 10 ** SIZE_DECIMALS
-        safe = math.floor(safe * factor) / factor
+    def bbo_snapshot(self) -> BboSnapshot:
+        """Consistent copy of the latest BBO (panel / notification formatting)."""
+        return BboSnapshot(self.bid, self.ask, self.bid_size, self.ask_size,
+                           self.is_zero, self.mid_price, self.last_update_ns)
 
-        return safe
 
-    def can_fill_close(self, size: float) -> bool:
-        """True if both sides have enough depth to fill a close order of given size."""
-        bbo = self.current_bbo
-        if time.time() - bbo["last_update"] > 1.0:
-            return False
-        return bbo["bid_size"] >= size and bbo["ask_size"] >= size
+# 单量 → Decimal 缓存: 单量都落在 SIZE_DECIMALS 网格上 (≤ ORDER_SIZE), 取值只有几十种
+_DEC_CACHE: Dict[float, Decimal] = {}
+_DEC_CACHE_MAX = 1024
+
+
+def order_size_decimal(size: float) -> Decimal:
+    """float 单量 → 下单用 Decimal (按当前币种精度量化, 同一单量只转换一次)"""
+    dec = _DEC_CACHE.get(size)
+    if dec is None:
+        dec = Decimal(str(size)).quantize(SIZE_QUANT)
+        if len(_DEC_CACHE) < _DEC_CACHE_MAX:
+            _DEC_CACHE[size] = dec
+    return dec
+
+
+@dataclass(frozen=True, slots=True)
+class EntryDecision:
+    """Everything _open_both needs, fixed at the moment the entry checks passed."""
+    size: float
+    a_side: str
+    b_side: str
+    dir_text: str
+    bbo: BboSnapshot
 
 
 # ─── Account Trader ───
@@ -708,10 +1304,18 @@ class AccountTrader:
             MAX_ORDERS_PER_MINUTE, MAX_ORDERS_PER_HALF_HOUR, MAX_ORDERS_PER_DAY,
             l2_address=l2_address, persistence=persistence,
         )
-        self.last_auth_time: float = 0
+        self.breaker = CircuitBreaker(name)
+        self.last_auth_time: float = float("-inf")   # time.monotonic() (Token 年龄只算时长, 不受 NTP 校时影响)
         self.initial_balance: float = 0.0
         self.current_balance: float = 0.0
         self.order_count: int = 0
+        # 市价单工厂: market / order_type 每单不变, 构造时只传方向和数量
+        # (账户在 apply_coin_preset 之后创建, MARKET 此时已是所选币种)
+        self._new_market_order = functools.partial(
+            Order, market=MARKET, order_type=OrderType.Market)
+        # SDK 方法在 connect() 中绑定一次, 下单/查余额不再逐次走 paradex.api_client 属性链
+        self._submit_order = None
+        self._fetch_summary = None
 
     async def connect(self) -> bool:
         """Connect to Paradex and obtain interactive token."""
@@ -722,13 +1326,24 @@ class AccountTrader:
                 l2_private_key=self.l2_private_key,
                 l2_address=self.l2_address,
             )
+            self._install_keepalive_client()
             await self.paradex.init_account()
             await self.auth_interactive()
+            api = self.paradex.api_client
+            self._submit_order = api.submit_order
+            self._fetch_summary = api.fetch_account_summary
             return True
         except Exception as e:
             logger.error(f"[{self.name}] 连接失败: {e}")
             return False
 
+    def _install_keepalive_client(self):
+        """Swap the SDK's httpx.Client for one that keeps TLS connections warm between orders."""
+        api = self.paradex.api_client
+        old = api.client
+        api.client = httpx.Client(headers=old.headers, timeout=old.timeout, limits=HTTP_LIMITS)
+        old.close()
+
     def _auth_interactive_sync(self):
         """Blocking interactive token request (runs in thread pool)."""
         import time as time_module
@@ -746,41 +1361,58 @@ class AccountTrader:
         account.set_jwt_token(data.jwt_token)
         api_client.client.headers.update({"Authorization": f"Bearer {data.jwt_token}"})
 
-        self.last_auth_time = time_module.time()
+        self.last_auth_time = time_module.monotonic()
         logger.info(f"[{self.name}] Interactive Token 获取成功")
 
     async def auth_interactive(self):
         """Async interactive token request — non-blocking."""
-        await asyncio.to_thread(self._auth_interactive_sync)
+        await asyncio.get_running_loop().run_in_executor(
+            ACCOUNT_IO_POOL, self._auth_interactive_sync)
 
-    async def refresh_token_if_needed(self, max_age: int = 240):
-        """Auto-refresh token before expiry (token TTL ~5min, refresh at 4min)."""
-        if time.time() - self.last_auth_time >= max_age:
+    async def refresh_token_if_needed(self, max_age: int = 240,
+                                      now: Optional[float] = None):
+        """Auto-refresh token before expiry (token TTL ~5min, refresh at 4min).
+
+        now: caller's time.monotonic() (token age is a duration, not wall time).
+        """
+        if (time.monotonic() if now is None else now) - self.last_auth_time >= max_age:
             await self.auth_interactive()
 
-    def _place_order_sync(self, side: str, size: float) -> dict:
+    def _place_order_sync(self, side: str, size: float,
+                          size_dec: Optional[Decimal] = None) -> dict:
         """Blocking market order (runs in thread pool)."""
-        order_side = OrderSide.Buy if side == "BUY" else OrderSide.Sell
-        logger.info(f"[{self.name}] SUBMIT {side} {size} {MARKET} (OrderSide={order_side})")
-        order = Order(
-            market=MARKET,
-            order_type=OrderType.Market,
+        order_side = _ORDER_SIDES[side]
+        logger.info("[%s] SUBMIT %s %s %s (OrderSide=%s)", self.name, side, size, MARKET, order_side)
+        order = self._new_market_order(
             order_side=order_side,
-            size=Decimal(str(size)),
+            size=size_dec if size_dec is not None else order_size_decimal(size),
         )
-        result = self.paradex.api_client.submit_order(order)
+        result = self._submit_order(order)
         self.order_count += 1
-        logger.info(f"[{self.name}] FILLED {side} {size} — result: {result}")
+        logger.info("[%s] FILLED %s %s — result: %s", self.name, side, size, result)
         return result
 
-    async def place_order_async(self, side: str, size: float) -> dict:
-        """Async market order — non-blocking, parallelizable via gather."""
-        return await asyncio.to_thread(self._place_order_sync, side, size)
+    async def place_order_async(self, side: str, size: float,
+                                size_dec: Optional[Decimal] = None) -> dict:
+        """Async market order — non-blocking, parallelizable via gather.
+
+        size_dec: size already converted by order_size_decimal(), so a pair of
+        legs (and their unwind / close) shares one Decimal.
+        Outcomes feed this account's circuit breaker.
+        """
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                ORDER_POOL, self._place_order_sync, side, size, size_dec)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
 
     def _get_balance_sync(self) -> float:
         """Blocking balance fetch."""
         try:
-            summary = self.paradex.api_client.fetch_account_summary()
+            summary = self._fetch_summary()
             if hasattr(summary, 'account_value') and summary.account_value:
                 return float(summary.account_value)
             if hasattr(summary, 'equity') and summary.equity:
@@ -793,11 +1425,12 @@ class AccountTrader:
 
     async def get_balance_async(self) -> float:
         """Async balance fetch."""
-        return await asyncio.to_thread(self._get_balance_sync)
+        return await asyncio.get_running_loop().run_in_executor(
+            ACCOUNT_IO_POOL, self._get_balance_sync)
 
-    def can_trade(self) -> tuple[bool, float, str]:
+    def can_trade(self, now: Optional[float] = None) -> tuple[bool, float, str]:
         """Check if rate limits allow placing an order."""
-        return self.rate_limiter.can_place_order()
+        return self.rate_limiter.can_place_order(now)
 
     def get_pnl(self) -> float:
         """Realized PnL based on balance delta."""
@@ -811,6 +1444,8 @@ class DualPnLTracker:
     def __init__(self):
         self.total_volume_usd: float = 0.0
         self.cycle_count: int = 0
+        self._stats_key: Optional[tuple] = None
+        self._stats: dict = {}
 
     def record_cycle(self, price: float, size: float):
         """
@@ -822,8 +1457,15 @@ class DualPnLTracker:
         self.cycle_count += 1
 
     def get_stats(self, account_a: AccountTrader, account_b: AccountTrader) -> dict:
-        pnl_a = account_a.get_pnl()
-        pnl_b = account_b.get_pnl()
+        bal_a, ini_a = account_a.current_balance, account_a.initial_balance
+        bal_b, ini_b = account_b.current_balance, account_b.initial_balance
+        key = (self.cycle_count, bal_a, ini_a, bal_b, ini_b)
+        if key == self._stats_key:
+            return self._stats
+
+        # 与 AccountTrader.get_pnl() 相同, 直接用上面已读出的余额
+        pnl_a = bal_a - ini_a
+        pnl_b = bal_b - ini_b
         pnl_total = pnl_a + pnl_b
 
         per_10k = 0.0
@@ -831,7 +1473,7 @@ class DualPnLTracker:
             # 正值 = 每万元成交赚多少, 负值 = 每万元成交亏多少
             per_10k = pnl_total / self.total_volume_usd * 10000
 
-        return {
+        self._stats = {
             "pnl_a": pnl_a,
             "pnl_b": pnl_b,
             "pnl_total": pnl_total,
@@ -839,6 +1481,8 @@ class DualPnLTracker:
             "per_10k": per_10k,
             "cycles": self.cycle_count,
         }
+        self._stats_key = key
+        return self._stats
 
 
 # ─── ANSI Colors ───
@@ -860,6 +1504,8 @@ class C:
     BYELLOW = "\033[93m"
     BCYAN  = "\033[96m"
     BWHITE = "\033[97m"
+    # 常量部分预先拼好, 每次只格式化数值
+    _PNL_ZERO = DIM + "0.0000" + RST
 
     @staticmethod
     def pnl(val: float) -> str:
@@ -868,7 +1514,7 @@ class C:
             return f"{C.BGREEN}+{val:.4f}{C.RST}"
         elif val < 0:
             return f"{C.BRED}{val:.4f}{C.RST}"
-        return f"{C.DIM}0.0000{C.RST}"
+        return C._PNL_ZERO
 
     @staticmethod
     def spread_color(spread: float, threshold: float) -> str:
@@ -879,21 +1525,26 @@ class C:
             return f"{C.BYELLOW}{spread:.5f}%{C.RST}"
         return f"{C.DIM}{spread:.5f}%{C.RST}"
 
+    # 面板只用三个固定上限和固定宽度, 键空间 ≤ 三个上限之和 (约 1.3k 条短串), 不设上限省去 LRU 维护
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def bar(current: int, maximum: int, width: int = 10) -> str:
-        """进度条: ████░░░░"""
-        ratio = min(current / maximum, 1.0) if maximum > 0 else 0
-        filled = int(ratio * width)
-        empty = width - filled
-        if ratio >= 0.9:
+        """进度条: ████░░░░ (纯整数运算; 计数变化慢, 结果按参数缓存)"""
+        if maximum > 0:
+            current = min(current, maximum)
+            filled = current * width // maximum
+        else:
+            current, maximum, filled = 0, 1, 0
+        if current * 10 >= maximum * 9:        # ≥ 90%
             color = C.BRED
-        elif ratio >= 0.7:
+        elif current * 10 >= maximum * 7:      # ≥ 70%
             color = C.BYELLOW
         else:
             color = C.BCYAN
-        return f"{color}{'█' * filled}{C.DIM}{'░' * empty}{C.RST}"
+        return f"{color}{'█' * filled}{C.DIM}{'░' * (width - filled)}{C.RST}"
 
     @staticmethod
+    @functools.lru_cache(maxsize=8)
     def state_badge(state_val: str) -> str:
         """状态标签上色"""
         if state_val == "IDLE":
@@ -903,6 +1554,7 @@ class C:
         return f"{C.DIM} {state_val} {C.RST}"
 
     @staticmethod
+    @functools.lru_cache(maxsize=8)
     def mode_badge(mode: str) -> str:
         """模式标签"""
         if mode == "burst":
@@ -915,30 +1567,102 @@ class FixedPanel:
     """Fixed-position terminal panel with ANSI overwrite refresh."""
 
     PANEL_LINES = 15
+    FULL_REDRAW_SEC = 1.0   # 平时只重写变化的行; 面板下方打印的警告会让面板错位, 故定期整帧重绘
 
     def __init__(self):
         self.initialized = False
+        self._prev_lines: list = [None] * self.PANEL_LINES
+        self._last_full: float = 0.0
+        # 光标控制序列只依赖固定行数, 预先拼好 (第 i 行: 上移到该行并清行 / 写完回到面板下方)
+        n = self.PANEL_LINES
+        self._full_prefix = f"\033[{n}A\033[J"
+        self._row_enter = [f"\033[{n - i}A\r\033[2K" for i in range(n)]
+        self._row_leave = [f"\r\033[{n - i}B" for i in range(n)]
+        # 写线程邮箱: 待写出的帧 (None = 写完后退出)
+        self._pending: list = []
+        self._pending_cv = threading.Condition()
+        self._writer: Optional[threading.Thread] = None
 
     def init_panel(self):
         if not self.initialized:
             print("\n" * self.PANEL_LINES, end="")
             self.initialized = True
+            self._prev_lines = [None] * self.PANEL_LINES
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="panel-writer", daemon=True)
+                self._writer.start()
+
+    def close(self):
+        """Write out every queued frame, then stop the writer thread."""
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        with self._pending_cv:
+            self._pending.append(None)
+            self._pending_cv.notify()
+        writer.join(timeout=1.0)
 
     def update(self, lines: list[str]):
-        sys.stdout.write(f"\033[{self.PANEL_LINES}A")
-        sys.stdout.write("\033[J")
-        for i, line in enumerate(lines):
-            if i < self.PANEL_LINES:
-                print(line)
-        for _ in range(self.PANEL_LINES - len(lines)):
-            print()
-        sys.stdout.flush()
+        n = self.PANEL_LINES
+        shown = lines if len(lines) <= n else lines[:n]
+        if len(shown) < n:
+            shown = shown + [""] * (n - len(shown))
+        prev = self._prev_lines
+        now = time.monotonic()
+        full = now - self._last_full >= self.FULL_REDRAW_SEC
+        if full:
+            # 整帧重绘: 光标上移 n 行, 清到屏尾, 写全部行
+            self._last_full = now
+            frame = self._full_prefix + "\n".join(shown) + "\n"
+        else:
+            # 只改变化的行: 上移到该行 → 清行 → 写入 → 回到面板下方
+            parts = []
+            enter, leave = self._row_enter, self._row_leave
+            for i, line in enumerate(shown):
+                if line != prev[i]:
+                    parts += (enter[i], line, leave[i])
+            if not parts:
+                return   # 内容没变就不重绘 (省掉终端 I/O)
+            frame = "".join(parts)
+        self._prev_lines = shown
+        if self._writer is None:
+            sys.stdout.write(frame)
+            sys.stdout.flush()
+            return
+        with self._pending_cv:
+            if full:
+                self._pending = [frame]   # 整帧覆盖全部行, 尚未写出的旧帧可直接丢弃
+            else:
+                self._pending.append(frame)
+            self._pending_cv.notify()
+
+    def _write_loop(self):
+        """Writer thread: take all queued frames at once and write them in one call."""
+        cv = self._pending_cv
+        while True:
+            with cv:
+                while not self._pending:
+                    cv.wait()
+                frames, self._pending = self._pending, []
+            done = frames[-1] is None
+            if done:
+                frames.pop()
+            if frames:
+                sys.stdout.write("".join(frames))
+                sys.stdout.flush()
+            if done:
+                return
 
 
 # ─── Strategy Controller ───
 class DualAccountController:
     """Core state machine: IDLE ⇄ HOLDING, with multi-group rotation and persistent rate limits."""
 
+    PANEL_BAR = f"{C.BCYAN}{'━' * 74}{C.RST}"   # 面板分隔线 (静态, 只拼一次)
+    PANEL_DIR_TEXT = {"A_LONG": f"{C.CYAN}A多B空{C.RST}",   # 面板 NEXT 方向文字 (已上色)
+                      "A_SHORT": f"{C.PURPLE}A空B多{C.RST}"}
+    WAITING_PAD = ("",) * 6                                  # 等待面板组列表下方的空行
+
     def __init__(self):
         self.observer = MarketObserver()
         self.account_a: Optional[AccountTrader] = None
@@ -946,7 +1670,9 @@ class DualAccountController:
         self.pnl_tracker = DualPnLTracker()
         self.latency_tracker = LatencyTracker()
         self.panel = FixedPanel()
-        self.tg = TelegramNotifier(TG_BOT_TOKEN, TG_CHAT_ID, TG_ENABLED)
+        self.tg = TelegramNotifier(TG_BOT_TOKEN or get_secret("TG_BOT_TOKEN"),
+                                   TG_CHAT_ID, TG_ENABLED)
+        self.stop_file = StopFileWatcher(EMERGENCY_STOP_FILE)
 
         # Persistence & groups
         self.persistence = RatePersistence(RATE_LIMITS_FILE)
@@ -961,6 +1687,7 @@ class DualAccountController:
         self.state = StrategyState.IDLE
         self.running = False
         self.start_time: Optional[float] = None
+        self.start_ns: int = 0      # 启动时刻 (monotonic ns), 面板运行时长用, 不受系统校时影响
 
         # 循环计数 (MAX_CYCLES 按组数倍增)
         self.total_max_cycles = MAX_CYCLES * len(self.groups)
@@ -973,16 +1700,32 @@ class DualAccountController:
         self.current_direction = "A_LONG"   # "A_LONG" 或 "A_SHORT"
 
         # 持仓计时 & 动态单量
-        self.hold_start_time: float = 0
+        self.hold_start_ns: int = 0
         self.current_position_size: float = 0  # 当前持仓单量 (平仓时用)
+        self.current_position_dec: Optional[Decimal] = None  # 同上, 开仓时转换好的 Decimal
 
         # 冲刺模式
         self.burst_rounds: int = 0
 
+        # 组切换/等待中 (后台维护暂停, 避免碰到正在替换的账户和等待面板)
+        self._switching: bool = False
+
+        # 面板重绘请求: 各处只 set(), 由 _display_loop 合并后按 DISPLAY_MIN_INTERVAL_SEC 限频绘制
+        self._display_dirty = asyncio.Event()
+
         # TG 通知控制
         self._last_tg_cycle: int = 0          # 上次发 TG 时的循环数
         self._burst_notified: bool = False     # 本次冲刺窗口是否已通知
 
+        # 余额后台刷新 (同一时刻最多一个在跑)
+        self._balance_task: Optional[asyncio.Task] = None
+        self._last_balance_update: float = 0.0
+
+        # 面板缓存: 显示内容签名不变时跳过整帧格式化; 行列表复用, 分隔线只写一次
+        self._display_sig: Optional[tuple] = None
+        self._display_lines: List[str] = [self.PANEL_BAR] * 12
+        self._header_key: Optional[tuple] = None   # 标题行 (状态/模式/组) 只在变化时重建
+
     # ─── Group Management ───
 
     def _validate_groups(self) -> bool:
@@ -991,33 +1734,34 @@ class DualAccountController:
             print(f"{C.BRED}❌ ACCOUNT_GROUPS 为空! 请在 config.py 中配置至少一组账户{C.RST}")
             return False
 
-        required = ["name", "l2_address_long", "l2_private_key_long",
-                     "l2_address_short", "l2_private_key_short"]
+        required = ["name", "l2_address_long", "l2_address_short"]
         for i, g in enumerate(self.groups):
             for field in required:
                 if not g.get(field):
                     print(f"{C.BRED}❌ 账户组 {i} ({g.get('name', '?')}) 缺少字段: {field}{C.RST}")
                     return False
+            for side in ("long", "short"):
+                if not group_private_key(g, side):
+                    print(f"{C.BRED}❌ 账户组 {i} ({g.get('name', '?')}) 缺少私钥: "
+                          f"l2_private_key_{side}{C.RST}")
+                    return False
         return True
 
-    def _find_available_group(self) -> int:
-        """Find the first group where both accounts can trade. Returns index or -1."""
-        for i, g in enumerate(self.groups):
-            can_long, _, _ = self.persistence.can_trade(g["l2_address_long"])
-            can_short, _, _ = self.persistence.can_trade(g["l2_address_short"])
-            if can_long and can_short:
-                return i
-        return -1
-
-    def _calc_wait_time(self) -> float:
-        """Calculate seconds until any group becomes available again."""
+    def _scan_groups(self) -> tuple[int, float]:
+        """One pass over the groups: (first available index, 0) or (-1, seconds
+        until the earliest group unlocks). earliest_unlock() is 0 exactly when
+        can_trade() would pass, so each account is looked up once."""
+        earliest_unlock = self.persistence.earliest_unlock
         min_wait = float("inf")
-        for g in self.groups:
-            wait_long = self.persistence.earliest_unlock(g["l2_address_long"])
-            wait_short = self.persistence.earliest_unlock(g["l2_address_short"])
+        for i, g in enumerate(self.groups):
+            wait_long = earliest_unlock(g["l2_address_long"])
+            wait_short = earliest_unlock(g["l2_address_short"])
+            if wait_long <= 0 and wait_short <= 0:
+                return i, 0.0
             group_wait = max(wait_long, wait_short)  # both must be free
-            min_wait = min(min_wait, group_wait)
-        return min_wait if min_wait != float("inf") else 0
+            if group_wait < min_wait:
+                min_wait = group_wait
+        return -1, (min_wait if min_wait != float("inf") else 0)
 
     async def _connect_group(self, group_idx: int) -> bool:
         """Connect a specific group's two accounts (long + short)."""
@@ -1025,25 +1769,24 @@ class DualAccountController:
         env = "prod" if PARADEX_ENV == "MAINNET" else "testnet"
         name = g["name"]
 
-        print(f"🔌 连接组 {C.BOLD}{name}{C.RST} — 做多账户 ({env})...")
+        print(f"🔌 连接组 {C.BOLD}{name}{C.RST} — 做多/做空账户 ({env})...")
         self.account_a = AccountTrader(
-            f"{name}-Long", g["l2_address_long"], g["l2_private_key_long"],
+            f"{name}-Long", g["l2_address_long"], group_private_key(g, "long"),
             persistence=self.persistence,
         )
-        if not await self.account_a.connect():
-            print(f"❌ 组 {name} 做多账户连接失败!")
-            return False
-        print(f"✅ 组 {name} 做多账户连接成功 (Interactive Token)")
-
-        print(f"🔌 连接组 {C.BOLD}{name}{C.RST} — 做空账户 ({env})...")
         self.account_b = AccountTrader(
-            f"{name}-Short", g["l2_address_short"], g["l2_private_key_short"],
+            f"{name}-Short", g["l2_address_short"], group_private_key(g, "short"),
             persistence=self.persistence,
         )
-        if not await self.account_b.connect():
-            print(f"❌ 组 {name} 做空账户连接失败!")
+        # 两个账户的初始化与鉴权互不依赖, 并行进行 (ACCOUNT_IO_POOL 正好 2 个线程)
+        ok_a, ok_b = await asyncio.gather(self.account_a.connect(), self.account_b.connect())
+        for ok, label in ((ok_a, "做多"), (ok_b, "做空")):
+            if ok:
+                print(f"✅ 组 {name} {label}账户连接成功 (Interactive Token)")
+            else:
+                print(f"❌ 组 {name} {label}账户连接失败!")
+        if not (ok_a and ok_b):
             return False
-        print(f"✅ 组 {name} 做空账户连接成功 (Interactive Token)")
 
         self.current_group_idx = group_idx
         self.current_group_name = name
@@ -1064,7 +1807,7 @@ class DualAccountController:
             await self._close_both(emergency=True)
 
         # 2. Find next available group
-        new_idx = self._find_available_group()
+        new_idx, _ = self._scan_groups()
         if new_idx < 0:
             return False
 
@@ -1089,12 +1832,16 @@ class DualAccountController:
         self.state = StrategyState.IDLE
         self.consecutive_failures = 0
         self.current_position_size = 0
+        self.current_position_dec = None
 
         return True
 
     # ─── Startup ───
 
     async def start(self):
+        self.stop_file.start()
+        prewarm_pool(ORDER_POOL, ORDER_POOL_WORKERS)
+        prewarm_pool(ACCOUNT_IO_POOL, ACCOUNT_IO_POOL_WORKERS)
         W = 74
         BAR = f"{C.BCYAN}{'━' * W}{C.RST}"
         print()
@@ -1127,13 +1874,12 @@ class DualAccountController:
             return
 
         # Load persistence & find first available group
-        start_idx = self._find_available_group()
+        start_idx, wait = self._scan_groups()
         if start_idx < 0:
-            wait = self._calc_wait_time()
             print(f"⏳ 所有账户组都已达到限额! 最快可用时间: {wait:.0f}s 后")
             print(f"   等待中...")
             await self._wait_for_available_group()
-            start_idx = self._find_available_group()
+            start_idx, _ = self._scan_groups()
             if start_idx < 0:
                 print("❌ 无可用账户组, 退出")
                 return
@@ -1168,6 +1914,7 @@ class DualAccountController:
         print()
         self.running = True
         self.start_time = time.time()
+        self.start_ns = time.monotonic_ns()
         self.panel.init_panel()
 
         try:
@@ -1176,6 +1923,7 @@ class DualAccountController:
             pass
         finally:
             self.tg.stop_polling()
+            self.stop_file.stop()
             await self.shutdown()
 
     def _group_available(self, g: dict) -> bool:
@@ -1187,11 +1935,8 @@ class DualAccountController:
     async def _wait_for_available_group(self):
         """Block until at least one group is available, showing countdown."""
         while True:
-            idx = self._find_available_group()
-            if idx >= 0:
-                return
-            wait = self._calc_wait_time()
-            if wait <= 0:
+            idx, wait = self._scan_groups()
+            if idx >= 0 or wait <= 0:
                 return
             print(f"\r  ⏳ 所有组限额满, 等待 {wait:.0f}s...", end="", flush=True)
             await asyncio.sleep(min(wait, 5))
@@ -1213,8 +1958,8 @@ class DualAccountController:
             print("⏳ 等待 BBO 数据...")
             for _ in range(50):
                 await asyncio.sleep(0.1)
-                if self.observer.current_bbo["last_update"] > 0:
-                    print(f"✅ 收到 BBO: ${self.observer.current_bbo['mid_price']:.0f}")
+                if self.observer.last_update_ns > 0:
+                    print(f"✅ 收到 BBO: ${self.observer.mid_price:.0f}")
                     return True
 
             print("❌ 等待 BBO 超时!")
@@ -1250,73 +1995,160 @@ class DualAccountController:
     # ─── Main Loop ───
 
     async def main_loop(self):
-        last_balance_check: float = 0
+        """Run the trading loop; cold-path work runs alongside in _housekeeping_loop / _display_loop."""
+        background = [asyncio.create_task(self._housekeeping_loop()),
+                      asyncio.create_task(self._display_loop())]
+        try:
+            await self._trading_loop()
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+
+    async def _trading_loop(self):
+        """Hot path: stop checks, quota check and the state machine only."""
+        # 每 tick 用到的对象/方法先绑定为局部变量 (LOAD_FAST); 账户在切组后重新绑定
+        tg, stop_file, dirty = self.tg, self.stop_file, self._display_dirty
+        acc_a, acc_b = self.account_a, self.account_b
+        handle_idle, handle_holding = self._handle_idle, self._handle_holding
+        wall, mono_ns, sleep = time.time, time.monotonic_ns, asyncio.sleep
+        obs, wake = self.observer, self.observer.wake
+        IDLE, HOLDING = StrategyState.IDLE, StrategyState.HOLDING
 
         while self.running and self.cycle_count < self.total_max_cycles:
             # ── Telegram /stop (后台轮询, 这里只读 bool, 零开销) ──
-            if self.tg.stop_requested:
+            if tg.stop_requested:
                 logger.info("Telegram /stop 指令触发停止")
                 stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
-                await self.tg.notify_error("Telegram /stop 指令", stats)
+                await tg.notify_error("Telegram /stop 指令", stats)
                 break
 
-            # 安全检查
-            if os.path.exists(EMERGENCY_STOP_FILE):
+            # 安全检查 (STOP 文件由后台任务检测, 这里只读 bool)
+            if stop_file.stop_requested:
                 logger.info("检测到紧急停止文件, 退出")
                 stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
-                await self.tg.notify_error("检测到 STOP 文件", stats)
+                await tg.notify_error("检测到 STOP 文件", stats)
                 break
             if self.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-                logger.error(f"连续失败 {self.consecutive_failures} 次, 停止策略")
+                logger.error("连续失败 %d 次, 停止策略", self.consecutive_failures)
                 stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
-                await self.tg.notify_error(
+                await tg.notify_error(
                     f"连续失败 {self.consecutive_failures} 次", stats
                 )
                 break
 
             try:
-                # 刷新两个账户的 Token (每 240s, 并行)
-                await asyncio.gather(
-                    self.account_a.refresh_token_if_needed(240),
-                    self.account_b.refresh_token_if_needed(240),
-                )
-
-                # 周期性更新余额 (每 10s)
-                now = time.time()
-                if now - last_balance_check > 10:
-                    await self._update_balances()
-                    last_balance_check = now
-
-                # 更新 WS 延迟
-                bbo = self.observer.current_bbo
-                if bbo["last_update"] > 0:
-                    ws_age_ms = (now - bbo["last_update"]) * 1000
-                    self.latency_tracker.update_ws_latency(ws_age_ms)
+                # 本 tick 的时钟只读一次, 传给状态机: now (墙钟, 速率窗口) / now_ns (单调, 0差/持仓时长)
+                now = wall()
+                now_ns = mono_ns()
+                # 两个账户的额度每 tick 只查一次, 结果传给状态机 (下单后的重新判定除外)
+                quota_ok = acc_a.can_trade(now)[0] and acc_b.can_trade(now)[0]
+                state = self.state
 
                 # ── 检查当前组是否还有额度, 否则切换 ──
-                if self.state == StrategyState.IDLE:
-                    can_a, _, _ = self.account_a.can_trade()
-                    can_b, _, _ = self.account_b.can_trade()
-                    if not can_a or not can_b:
-                        logger.info(f"组 {self.current_group_name} 限额满, 尝试切换...")
-                        if not await self._try_switch_or_wait():
+                if state == IDLE:
+                    if not quota_ok:
+                        logger.info("组 %s 限额满, 尝试切换...", self.current_group_name)
+                        self._switching = True
+                        try:
+                            switched = await self._try_switch_or_wait()
+                        finally:
+                            self._switching = False
+                        if not switched:
                             break  # all exhausted and user stopped
+                        acc_a, acc_b = self.account_a, self.account_b
                         continue
 
                 # 状态机
-                if self.state == StrategyState.IDLE:
-                    await self._handle_idle()
-                elif self.state == StrategyState.HOLDING:
-                    await self._handle_holding()
+                cycles = self.cycle_count
+                if state == IDLE:
+                    await handle_idle(now, now_ns)
+                elif state == HOLDING:
+                    await handle_holding(now, now_ns, quota_ok)
+                if self.state != state or self.cycle_count != cycles:
+                    dirty.set()   # 开/平仓后尽快刷新面板
+
+            except Exception as e:
+                logger.error("主循环错误: %s", e)
+                self.consecutive_failures += 1
+
+            # 持仓中或 0 差进行中按正常节拍; 否则长休眠, 0 差临近入场时被 wake 提前唤醒
+            if self.state == HOLDING or obs.zero_spread_duration_ns:
+                await sleep(TRADING_TICK_SEC)
+            else:
+                wake.clear()
+                try:
+                    await asyncio.wait_for(wake.wait(), IDLE_TICK_SEC)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _housekeeping_loop(self):
+        """Cold path (~2 Hz): token refresh, balance poll, WS latency, panel."""
+        last_balance_check: float = float("-inf")
+        last_token_check: float = float("-inf")
+        last_display_req: float = float("-inf")
+        shown_bbo_ns = 0
+        obs, latency = self.observer, self.latency_tracker
+        recorder = obs.recorder
+
+        while self.running:
+            await asyncio.sleep(HOUSEKEEPING_INTERVAL_SEC)
+            if self._switching:
+                continue
+
+            try:
+                # 本轮时间只取一次, 传给下游 (token / 余额 / WS 延迟); 都是时长, 用单调时钟
+                now = time.monotonic()
+                now_ns = time.monotonic_ns()
+
+                # 刷新两个账户的 Token (每 240s, 并行); 每 TOKEN_CHECK_INTERVAL_SEC 才检查一次,
+                # 其余轮次不创建协程
+                if now - last_token_check >= TOKEN_CHECK_INTERVAL_SEC:
+                    last_token_check = now
+                    await asyncio.gather(
+                        self.account_a.refresh_token_if_needed(240, now),
+                        self.account_b.refresh_token_if_needed(240, now),
+                    )
+
+                # 周期性更新余额 (每 10s); 冲刺模式期间暂停, 结束后的下一轮立即补查
+                if obs.mode == "burst":
+                    last_balance_check = float("-inf")
+                elif now - last_balance_check > 10:
+                    self._schedule_balance_update(0)
+                    last_balance_check = now
+
+                # 行情停滞时 record() 不再被调用, 由这里按时刷出 BBO 缓冲
+                recorder.flush_if_stale()
+
+                # 更新 WS 延迟
+                last_ns = obs.last_update_ns
+                if last_ns > 0:
+                    latency.update_ws_age(now_ns - last_ns)   # 整数 ns, 显示时再换算
 
-                # 更新显示
-                self._update_display()
+                # 有新行情, 或距上次请求已满 DISPLAY_MAX_IDLE_SEC, 才请求刷新显示 (由 _display_loop 绘制);
+                # 开/平仓等状态变化由交易循环直接请求
+                if last_ns != shown_bbo_ns or now - last_display_req >= DISPLAY_MAX_IDLE_SEC:
+                    shown_bbo_ns = last_ns
+                    last_display_req = now
+                    self._display_dirty.set()
 
             except Exception as e:
-                logger.error(f"主循环错误: {e}")
+                logger.error("后台维护错误: %s", e)
                 self.consecutive_failures += 1
 
-            await asyncio.sleep(0.05)
+    async def _display_loop(self):
+        """Render the panel when requested, coalescing requests to at most 4 Hz."""
+        while self.running:
+            await self._display_dirty.wait()
+            self._display_dirty.clear()
+            if not self.running:
+                break
+            if not self._switching:
+                try:
+                    self._update_display()
+                except Exception as e:
+                    logger.error("面板刷新错误: %s", e)
+            await asyncio.sleep(DISPLAY_MIN_INTERVAL_SEC)
 
     async def _try_switch_or_wait(self) -> bool:
         """Try to switch group, or wait if all groups are full. Returns False to stop."""
@@ -1327,10 +2159,10 @@ class DualAccountController:
         while self.running:
             if self.tg.stop_requested:
                 return False
-            if os.path.exists(EMERGENCY_STOP_FILE):
+            if self.stop_file.stop_requested:
                 return False
 
-            wait = self._calc_wait_time()
+            _, wait = self._scan_groups()
             if wait <= 0:
                 break
 
@@ -1356,154 +2188,171 @@ class DualAccountController:
 
     # ─── State Handlers ───
 
-    async def _handle_idle(self):
-        """IDLE → check zero-gap + dynamic size → open both."""
-        # 1. 价差条件
-        if not self.observer.is_spread_ready(ENTRY_ZERO_SPREAD_MS):
+    async def _handle_idle(self, now: float, now_ns: int):
+        """IDLE → check zero-gap + dynamic size → open both (quota already checked by the loop)."""
+        # 快路径: 绝大多数 tick 0 差时长不够 (非 0 差时为 0), 一次 int 比较即返回
+        if self.observer.zero_spread_duration_ns < ENTRY_ZERO_SPREAD_NS:
             return
+        decision = self._decide_entry(ENTRY_ZERO_SPREAD_NS, now, now_ns, quota_ok=True)
+        if decision is not None:
+            await self._open_both(decision)
+
+    def _decide_entry(self, min_zero_ns: int, now: Optional[float] = None,
+                      now_ns: Optional[int] = None,
+                      quota_ok: Optional[bool] = None) -> Optional[EntryDecision]:
+        """Run the entry checks once; None if any fails, else a decision for _open_both.
+
+        now / now_ns: the tick's time.time() and time.monotonic_ns(); read here
+        when the caller has none (burst re-entry after an await).
+        quota_ok: both accounts' rate-limit result for this tick; None re-checks
+        (needed after orders were just recorded).
+        """
+        obs = self.observer
+        if now_ns is None:
+            now, now_ns = time.time(), time.monotonic_ns()
+        # 1. 价差条件
+        if not obs.is_spread_ready(min_zero_ns, now_ns):
+            return None
 
         # 2. 动态计算安全单量 (根据薄边深度)
-        safe_size = self.observer.calc_safe_size()
-        if safe_size <= 0:
-            return
-
-        # 3. 两个账户都要有下单额度
-        can_a, _, _ = self.account_a.can_trade()
-        can_b, _, _ = self.account_b.can_trade()
-        if not can_a or not can_b:
-            return
-
-        await self._open_both(safe_size)
-
-    async def _handle_holding(self):
+        size = obs.calc_safe_size(now_ns)
+        if size <= 0:
+            return None
+
+        # 3. 两个账户都要有下单额度, 且都不在熔断中 (熔断时跳过, 不算失败, 也不会单边成交)
+        acc_a, acc_b = self.account_a, self.account_b
+        if quota_ok is None:
+            quota_ok = acc_a.can_trade(now)[0] and acc_b.can_trade(now)[0]
+        if not quota_ok:
+            return None
+        if not (acc_a.breaker.allow() and acc_b.breaker.allow()):
+            return None
+
+        a_side, b_side, dir_text = _OPEN_SIDES[self.current_direction]
+        return EntryDecision(size, a_side, b_side, dir_text, obs.bbo_snapshot())
+
+    async def _handle_holding(self, now: float, now_ns: int, quota_ok: bool):
         """HOLDING → wait for zero-gap to close, or force-close on timeout."""
         # 超时强制平仓 (不管深度, 必须平)
-        hold_time = time.time() - self.hold_start_time
-        if hold_time > MAX_HOLD_SECONDS:
-            logger.warning(f"持仓超时 ({hold_time:.1f}s > {MAX_HOLD_SECONDS}s), 强制平仓")
+        hold_ns = now_ns - self.hold_start_ns
+        if hold_ns > MAX_HOLD_NS:
+            logger.warning("持仓超时 (%.1fs > %ss), 强制平仓", hold_ns / 1e9, MAX_HOLD_SECONDS)
             await self._close_both(emergency=True)
             return
 
         # 平仓条件: 0差等待时间减半 + 双边深度能填平仓单量
-        exit_min_ms = ENTRY_ZERO_SPREAD_MS / 2
+        obs = self.observer
+        if obs.zero_spread_duration_ns < EXIT_ZERO_SPREAD_NS:
+            return   # 快路径: 0 差时长不够, 不进入完整判定
 
-        if not self.observer.is_spread_ready(exit_min_ms):
+        if not obs.is_spread_ready(EXIT_ZERO_SPREAD_NS, now_ns):
             return
 
-        if not self.observer.can_fill_close(self.current_position_size):
+        if not obs.can_fill_close(self.current_position_size, now_ns):
             return
 
-        # 两个账户都要有下单额度
-        can_a, _, _ = self.account_a.can_trade()
-        can_b, _, _ = self.account_b.can_trade()
-        if not can_a or not can_b:
+        # 两个账户都要有下单额度 (本 tick 已查过)
+        if not quota_ok:
             return
 
         await self._close_both()
 
     # ─── Open / Close ───
 
-    async def _open_both(self, size: float):
+    async def _place_pair(self, a_side: str, b_side: str, size: float,
+                          size_dec: Optional[Decimal]) -> list:
+        """Place both legs as tasks created before the first await, so the two
+        requests go out in the same loop turn. Returns results/exceptions like
+        gather(..., return_exceptions=True)."""
+        loop = asyncio.get_running_loop()
+        ta = loop.create_task(self.account_a.place_order_async(a_side, size, size_dec))
+        tb = loop.create_task(self.account_b.place_order_async(b_side, size, size_dec))
+        await asyncio.wait((ta, tb))
+        return [ta.exception() or ta.result(), tb.exception() or tb.result()]
+
+    async def _open_both(self, decision: EntryDecision):
         """Place opposing market orders on A and B simultaneously."""
-        cycle_start = time.time()
+        cycle_start = time.perf_counter()
+        size, a_side, b_side = decision.size, decision.a_side, decision.b_side
+        dir_text = decision.dir_text
+        bbo = decision.bbo   # 决策时刻的行情, 下单期间不随 WS 变化
+        logger.info("[%s] 开仓: %s | %s %s (薄边:%.4f)", self.current_group_name, dir_text,
+                    size, COIN_SYMBOL, min(bbo.bid_size, bbo.ask_size))
 
-        if self.current_direction == "A_LONG":
-            a_side, b_side = "BUY", "SELL"
-        else:
-            a_side, b_side = "SELL", "BUY"
-
-        dir_text = "A多B空" if self.current_direction == "A_LONG" else "A空B多"
-        bbo = self.observer.current_bbo
-        logger.info(f"[{self.current_group_name}] 开仓: {dir_text} | {size} {COIN_SYMBOL} "
-                     f"(薄边:{min(bbo['bid_size'], bbo['ask_size']):.4f})")
-
-        # 并行下单 (asyncio.to_thread 让两个 HTTP 同时发出)
-        results = await asyncio.gather(
-            self.account_a.place_order_async(a_side, size),
-            self.account_b.place_order_async(b_side, size),
-            return_exceptions=True,
-        )
+        # 并行下单 (ORDER_POOL 让两个 HTTP 同时发出); 两腿共用一个 Decimal
+        size_dec = order_size_decimal(size)
+        results = await self._place_pair(a_side, b_side, size, size_dec)
 
         a_ok = not isinstance(results[0], Exception)
         b_ok = not isinstance(results[1], Exception)
 
         if a_ok and b_ok:
             # ✅ 两边都成功 → 记录持仓单量
-            self.account_a.rate_limiter.record_order()
-            self.account_b.rate_limiter.record_order()
+            RateLimiter.record_pair(self.account_a.rate_limiter, self.account_b.rate_limiter)
             self.current_position_size = size
+            self.current_position_dec = size_dec
             self.state = StrategyState.HOLDING
-            self.hold_start_time = time.time()
+            self.hold_start_ns = time.monotonic_ns()
             self.consecutive_failures = 0
 
-            latency_ms = (time.time() - cycle_start) * 1000
-            logger.info(f"开仓成功 | {dir_text} | {size} {COIN_SYMBOL} | {latency_ms:.0f}ms")
+            latency_ms = (time.perf_counter() - cycle_start) * 1000
+            logger.info("开仓成功 | %s | %s %s | %.0fms", dir_text, size, COIN_SYMBOL, latency_ms)
 
-        elif a_ok and not b_ok:
-            # ⚠️ A 成功 B 失败 → 立刻回撤 A
-            logger.error(f"[B] 开仓失败: {results[1]}, 回撤 A...")
-            self.account_a.rate_limiter.record_order()
-            try:
-                reverse = "SELL" if a_side == "BUY" else "BUY"
-                await self.account_a.place_order_async(reverse, size)
-                self.account_a.rate_limiter.record_order()
-                logger.info("[A] 回撤成功")
-            except Exception as e:
-                logger.error(f"[A] 回撤失败: {e} — 请手动检查 A 的持仓!")
-            self.state = StrategyState.IDLE
-            self.consecutive_failures += 1
-            self.failed_cycles += 1
-
-        elif not a_ok and b_ok:
-            # ⚠️ B 成功 A 失败 → 立刻回撤 B
-            logger.error(f"[A] 开仓失败: {results[0]}, 回撤 B...")
-            self.account_b.rate_limiter.record_order()
-            try:
-                reverse = "BUY" if b_side == "SELL" else "SELL"
-                await self.account_b.place_order_async(reverse, size)
-                self.account_b.rate_limiter.record_order()
-                logger.info("[B] 回撤成功")
-            except Exception as e:
-                logger.error(f"[B] 回撤失败: {e} — 请手动检查 B 的持仓!")
+        elif a_ok or b_ok:
+            # ⚠️ 单边成交 → 立刻回撤成交的一边
+            if a_ok:
+                await self._unwind_open("A", self.account_a, a_side, "B", results[1], size, size_dec)
+            else:
+                await self._unwind_open("B", self.account_b, b_side, "A", results[0], size, size_dec)
             self.state = StrategyState.IDLE
             self.consecutive_failures += 1
             self.failed_cycles += 1
 
         else:
             # ❌ 两边都失败
-            logger.error(f"开仓全部失败: A={results[0]}, B={results[1]}")
+            logger.error("开仓全部失败: A=%s, B=%s", results[0], results[1])
             self.state = StrategyState.IDLE
             self.consecutive_failures += 1
             self.failed_cycles += 1
 
+    async def _unwind_open(self, name: str, account: AccountTrader, side: str,
+                           failed_name: str, error: BaseException,
+                           size: float, size_dec: Decimal):
+        """One leg of an open filled and the other failed: reverse the filled leg."""
+        logger.error("[%s] 开仓失败: %s, 回撤 %s...", failed_name, error, name)
+        account.rate_limiter.record_order()
+        try:
+            await account.place_order_async(_REVERSE[side], size, size_dec)
+            account.rate_limiter.record_order()
+            logger.info("[%s] 回撤成功", name)
+        except Exception as e:
+            logger.error("[%s] 回撤失败: %s — 请手动检查 %s 的持仓!", name, e, name)
+
     async def _close_both(self, emergency: bool = False):
         """Close both positions. On success, may trigger burst re-open."""
-        cycle_start = time.time()
+        cycle_start = time.perf_counter()
+        acc_a, acc_b, obs = self.account_a, self.account_b, self.observer
         close_size = self.current_position_size  # 用开仓时的单量平仓
+        bbo = obs.bbo_snapshot()                  # 平仓决策时刻的行情 (成交量按此价格记)
 
         # 平仓方向: 和开仓相反
-        if self.current_direction == "A_LONG":
-            a_side, b_side = "SELL", "BUY"    # A 平多, B 平空
-        else:
-            a_side, b_side = "BUY", "SELL"    # A 平空, B 平多
+        a_side, b_side = _CLOSE_SIDES[self.current_direction]
 
         tag = " (超时强制)" if emergency else ""
-        logger.info(f"[{self.current_group_name}] 平仓{tag} | {close_size} {COIN_SYMBOL}")
+        logger.info("[%s] 平仓%s | %s %s", self.current_group_name, tag, close_size, COIN_SYMBOL)
 
         # 并行平仓
-        results = await asyncio.gather(
-            self.account_a.place_order_async(a_side, close_size),
-            self.account_b.place_order_async(b_side, close_size),
-            return_exceptions=True,
-        )
+        results = await self._place_pair(a_side, b_side, close_size, self.current_position_dec)
 
         a_ok = not isinstance(results[0], Exception)
         b_ok = not isinstance(results[1], Exception)
 
-        if a_ok:
-            self.account_a.rate_limiter.record_order()
-        if b_ok:
-            self.account_b.rate_limiter.record_order()
+        if a_ok and b_ok:
+            RateLimiter.record_pair(acc_a.rate_limiter, acc_b.rate_limiter)
+        elif a_ok:
+            acc_a.rate_limiter.record_order()
+        elif b_ok:
+            acc_b.rate_limiter.record_order()
 
         if a_ok and b_ok:
             # ✅ 一个完整循环 (开+平) 完成
@@ -1512,232 +2361,252 @@ class DualAccountController:
             self.consecutive_failures = 0
 
             # 记录成交量 & 延迟 (使用实际平仓单量)
-            price = self.observer.current_bbo["mid_price"]
-            self.pnl_tracker.record_cycle(price, close_size)
-            latency_ms = (time.time() - cycle_start) * 1000
+            self.pnl_tracker.record_cycle(bbo.mid_price, close_size)
+            latency_ms = (time.perf_counter() - cycle_start) * 1000
             self.latency_tracker.record_cycle_latency(latency_ms)
-            logger.info(f"✅ 循环 {self.cycle_count} 完成 | {close_size} {COIN_SYMBOL} | {latency_ms:.0f}ms")
+            logger.info("✅ 循环 %d 完成 | %s %s | %.0fms", self.cycle_count, close_size, COIN_SYMBOL, latency_ms)
 
-            # 更新余额 (知道真实盈亏)
-            await self._update_balances()
+            # 更新余额 (知道真实盈亏); 后台进行, 冲刺模式可立即进入下一轮
+            self._schedule_balance_update()
 
             # TG: 周期性进度报告
             if (self.cycle_count - self._last_tg_cycle) >= TG_NOTIFY_INTERVAL:
                 self._last_tg_cycle = self.cycle_count
                 elapsed = time.time() - self.start_time if self.start_time else 0
-                stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
+                stats = self.pnl_tracker.get_stats(acc_a, acc_b)
                 await self.tg.notify_progress(
                     self.cycle_count, stats,
-                    self.account_a, self.account_b,
+                    acc_a, acc_b,
                     elapsed / 60,
                 )
 
             # 交替方向
-            self.current_direction = (
-                "A_SHORT" if self.current_direction == "A_LONG" else "A_LONG"
-            )
+            self.current_direction = _NEXT_DIR[self.current_direction]
 
             # ── 冲刺模式: 平仓后立即重新开仓 ──
-            if (self.observer.mode == "burst"
+            if (obs.mode == "burst"
                     and self.burst_rounds < MAX_ROUNDS_PER_BURST
                     and self.cycle_count < self.total_max_cycles
                     and not emergency):
 
                 # 冲刺时放宽条件: 只要当前仍是 0 差就行, 动态算单量
-                if self.observer.is_spread_ready(0):
-                    burst_size = self.observer.calc_safe_size()
-                    if burst_size > 0:
-                        can_a, _, _ = self.account_a.can_trade()
-                        can_b, _, _ = self.account_b.can_trade()
-                        if can_a and can_b:
-                            self.burst_rounds += 1
-                            # TG: 冲刺模式首次触发时通知
-                            if self.burst_rounds == 1 and not self._burst_notified:
-                                self._burst_notified = True
-                                bbo = self.observer.current_bbo
-                                await self.tg.notify_burst(
-                                    self.observer.zero_spread_duration_ms,
-                                    bbo["bid_size"], bbo["ask_size"],
-                                )
-                            logger.info(f"🔥 冲刺连续开仓 (第 {self.burst_rounds} 轮) | {burst_size} {COIN_SYMBOL}")
-                            await self._open_both(burst_size)
-                            return  # state 已在 _open_both 中设为 HOLDING 或 IDLE
+                decision = self._decide_entry(0)
+                if decision is not None:
+                    self.burst_rounds += 1
+                    # TG: 冲刺模式首次触发时通知
+                    if self.burst_rounds == 1 and not self._burst_notified:
+                        self._burst_notified = True
+                        await self.tg.notify_burst(
+                            obs.zero_spread_duration_ms,
+                            decision.bbo.bid_size, decision.bbo.ask_size,
+                        )
+                    logger.info("🔥 冲刺连续开仓 (第 %d 轮) | %s %s", self.burst_rounds, decision.size, COIN_SYMBOL)
+                    await self._open_both(decision)
+                    return  # state 已在 _open_both 中设为 HOLDING 或 IDLE
 
             # 非冲刺 / 冲刺结束 → 回到 IDLE
             self.burst_rounds = 0
             self._burst_notified = False
             self.state = StrategyState.IDLE
 
-        elif a_ok and not b_ok:
-            # ⚠️ A 平了, B 没平 → 重试 B
-            logger.error(f"[B] 平仓失败: {results[1]}, 开始重试...")
-            if await self._retry_close("B", self.account_b, b_side):
-                self._on_close_success()
-            else:
-                logger.error("⛔ [B] 平仓重试耗尽! B 仍有持仓, 策略停止, 请手动处理")
-                stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
-                await self.tg.notify_error("B 平仓重试耗尽, B 仍有持仓!", stats)
-                self.running = False
-                self.state = StrategyState.IDLE
-
-        elif not a_ok and b_ok:
-            # ⚠️ B 平了, A 没平 → 重试 A
-            logger.error(f"[A] 平仓失败: {results[0]}, 开始重试...")
-            if await self._retry_close("A", self.account_a, a_side):
-                self._on_close_success()
+        elif a_ok or b_ok:
+            # ⚠️ 单边平仓 → 重试没平掉的一边
+            if a_ok:
+                await self._finish_one_sided_close("B", acc_b, b_side, results[1])
             else:
-                logger.error("⛔ [A] 平仓重试耗尽! A 仍有持仓, 策略停止, 请手动处理")
-                stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
-                await self.tg.notify_error("A 平仓重试耗尽, A 仍有持仓!", stats)
-                self.running = False
-                self.state = StrategyState.IDLE
+                await self._finish_one_sided_close("A", acc_a, a_side, results[0])
 
         else:
             # ❌ 两边都失败 → 仍持仓, 下轮重试
-            logger.error(f"平仓全部失败: A={results[0]}, B={results[1]}")
+            logger.error("平仓全部失败: A=%s, B=%s", results[0], results[1])
             self.consecutive_failures += 1
             # state 保持 HOLDING, 下次循环会再尝试平仓
 
+    async def _finish_one_sided_close(self, name: str, account: AccountTrader, side: str,
+                                      error: BaseException):
+        """The other leg closed; retry this one, or stop the strategy if retries run out."""
+        logger.error("[%s] 平仓失败: %s, 开始重试...", name, error)
+        if await self._retry_close(name, account, side):
+            self._on_close_success()
+            return
+        logger.error("⛔ [%s] 平仓重试耗尽! %s 仍有持仓, 策略停止, 请手动处理", name, name)
+        stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
+        await self.tg.notify_error(f"{name} 平仓重试耗尽, {name} 仍有持仓!", stats)
+        self.running = False
+        self.state = StrategyState.IDLE
+
     async def _retry_close(self, name: str, account: AccountTrader, side: str) -> bool:
         """Retry a failed close up to 3 times using the stored position size."""
         close_size = self.current_position_size
-        for attempt in range(1, 4):
+        # 指数退避 + 抖动 (第 2/3 次前等 0.1 / 0.2s, 各 ×0.5~1.5), 比固定 0.5s 更快重试、错开瞬时拥塞;
+        # 最后一次失败后不再等待, 立即交给单边失败处理
+        for attempt in range(1, CLOSE_RETRY_ATTEMPTS + 1):
+            if attempt > 1:
+                await asyncio.sleep(CLOSE_RETRY_DELAYS[attempt - 2] * (0.5 + random.random()))
             try:
-                await account.place_order_async(side, close_size)
+                await account.place_order_async(side, close_size, self.current_position_dec)
                 account.rate_limiter.record_order()
-                logger.info(f"[{name}] 重试平仓成功 (第{attempt}次) | {close_size} {COIN_SYMBOL}")
+                logger.info("[%s] 重试平仓成功 (第%d次) | %s %s", name, attempt, close_size, COIN_SYMBOL)
                 return True
             except Exception as e:
-                logger.error(f"[{name}] 重试平仓失败 (第{attempt}次): {e}")
-                await asyncio.sleep(0.5)
+                logger.error("[%s] 重试平仓失败 (第%d次): %s", name, attempt, e)
         return False
 
     def _on_close_success(self):
         """Common post-close bookkeeping (cycle count, PnL, direction flip)."""
         self.cycle_count += 1
         self.successful_cycles += 1
-        price = self.observer.current_bbo["mid_price"]
+        price = self.observer.mid_price
         self.pnl_tracker.record_cycle(price, self.current_position_size)
-        self.current_direction = (
-            "A_SHORT" if self.current_direction == "A_LONG" else "A_LONG"
-        )
+        self.current_direction = _NEXT_DIR[self.current_direction]
         self.burst_rounds = 0
         self.current_position_size = 0
+        self.current_position_dec = None
         self.state = StrategyState.IDLE
 
     # ─── Helpers ───
 
     async def _update_balances(self):
         """Fetch balances for both accounts in parallel."""
-        bal_a, bal_b = await asyncio.gather(
-            self.account_a.get_balance_async(),
-            self.account_b.get_balance_async(),
-        )
+        loop = asyncio.get_running_loop()
+        ta = loop.create_task(self.account_a.get_balance_async())
+        tb = loop.create_task(self.account_b.get_balance_async())
+        bal_a, bal_b = await ta, await tb
         if bal_a > 0:
             self.account_a.current_balance = bal_a
         if bal_b > 0:
             self.account_b.current_balance = bal_b
 
+    def _schedule_balance_update(self, min_interval: float = BALANCE_MIN_INTERVAL_SEC):
+        """Refresh balances in the background, at most one in flight and one per min_interval."""
+        task = self._balance_task
+        if task is not None and not task.done():
+            return
+        now = time.monotonic()
+        if now - self._last_balance_update < min_interval:
+            return
+        self._last_balance_update = now
+        self._balance_task = asyncio.create_task(self._update_balances_quietly())
+
+    async def _update_balances_quietly(self):
+        try:
+            await self._update_balances()
+        except Exception as e:
+            logger.warning("余额刷新失败: %s", e)
+
     def _update_display(self):
         """Refresh the terminal monitoring panel."""
-        bbo = self.observer.current_bbo
-        now = time.time()
-
-        ws_age = (now - bbo["last_update"]) * 1000 if bbo["last_update"] > 0 else 0
-        elapsed = now - self.start_time if self.start_time else 0
-        elapsed_min = elapsed / 60
-        elapsed_hr = elapsed / 3600
+        acc_a, acc_b, obs = self.account_a, self.account_b, self.observer
+        state, cycle_count, group_name = self.state, self.cycle_count, self.current_group_name
+        bbo = obs.bbo_snapshot()
+        now_ns = time.monotonic_ns()
+
+        last_ns = bbo.last_update_ns
+        ws_ms = (now_ns - last_ns) // 1_000_000 if last_ns > 0 else 0
+        elapsed_ns = now_ns - self.start_ns if self.start_ns else 0
+
+        # 运行时长: 整数十分位 (0.1h / 0.1m, 四舍五入), 文本只在签名变化后生成
+        if elapsed_ns >= 3_600_000_000_000:
+            elapsed_tenths, elapsed_unit = (elapsed_ns + 180_000_000_000) // 360_000_000_000, "h"
+        else:
+            elapsed_tenths, elapsed_unit = (elapsed_ns + 3_000_000_000) // 6_000_000_000, "m"
 
-        pnl_a = self.account_a.get_pnl()
-        pnl_b = self.account_b.get_pnl()
+        pnl_a = acc_a.get_pnl()
+        pnl_b = acc_b.get_pnl()
         pnl_total = pnl_a + pnl_b
-        stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
 
-        min_a, half_a, day_a = self.account_a.rate_limiter.get_counts()
-        min_b, half_b, day_b = self.account_b.rate_limiter.get_counts()
+        min_a, half_a, day_a = acc_a.rate_limiter.get_counts()
+        min_b, half_b, day_b = acc_b.rate_limiter.get_counts()
+
+        zero_ms = int(obs.zero_spread_duration_ms)
+        holding = state == StrategyState.HOLDING
+        size = self.current_position_size if holding else obs.calc_safe_size()
+
+        # 签名覆盖面板上所有可见字段 (按显示精度取整); 不变则本帧与上一帧相同, 直接跳过
+        sig = (state, obs.mode, group_name, self.current_direction,
+               bbo.bid, bbo.ask, bbo.bid_size, bbo.ask_size, size, zero_ms, ws_ms, elapsed_tenths, elapsed_unit,
+               cycle_count, self.successful_cycles, self.failed_cycles, self.burst_rounds,
+               acc_a.current_balance, acc_b.current_balance,
+               int(pnl_a * 10000), int(pnl_b * 10000),
+               min_a, half_a, day_a, min_b, half_b, day_b)
+        if sig == self._display_sig:
+            return
+        self._display_sig = sig
+
+        stats = self.pnl_tracker.get_stats(acc_a, acc_b)
+        time_text = f"{elapsed_tenths // 10}.{elapsed_tenths % 10}{elapsed_unit}"
 
-        dir_text = f"{C.CYAN}A多B空{C.RST}" if self.current_direction == "A_LONG" else f"{C.PURPLE}A空B多{C.RST}"
-        zero_ms = self.observer.zero_spread_duration_ms
+        dir_text = self.PANEL_DIR_TEXT[self.current_direction]
         zero_color = C.BGREEN if zero_ms > 0 else C.DIM
 
         # 动态单量
-        if self.state == StrategyState.HOLDING:
-            size_text = f"{C.BYELLOW}{self.current_position_size}{C.RST}"
-        else:
-            safe = self.observer.calc_safe_size()
-            size_text = f"{C.BCYAN}{safe}{C.RST}" if safe > 0 else f"{C.DIM}--{C.RST}"
-
-        # 运行时间格式
-        if elapsed_hr >= 1:
-            time_text = f"{elapsed_hr:.1f}h"
+        if holding:
+            size_text = f"{C.BYELLOW}{size}{C.RST}"
         else:
-            time_text = f"{elapsed_min:.1f}m"
-
-        # 组信息
-        grp_text = (f"{C.BOLD}GRP{C.RST} {C.BWHITE}{self.current_group_name}{C.RST}"
-                    f"/{len(self.groups)}")
-
-        W = 74
-        BAR = f"{C.BCYAN}{'━' * W}{C.RST}"
-
-        lines = [
-            BAR,
-            f"  {C.BOLD}{C.BWHITE}PARADEX DUAL HEDGE{C.RST}"
-            f"  {C.state_badge(self.state.value)}"
-            f"  {C.mode_badge(self.observer.mode)}"
-            f"  {C.DIM}{MARKET}{C.RST}"
-            f"  {grp_text}",
-            BAR,
-            # ── 行情 ──
-            f"  {C.BOLD}PRICE{C.RST}  {C.BWHITE}${bbo['mid_price']:,.2f}{C.RST}"
-            f"    {C.BOLD}SPREAD{C.RST}  {C.spread_color(bbo['spread'], ZERO_SPREAD_THRESHOLD)}"
-            f"    {C.BOLD}0-GAP{C.RST}  {zero_color}{zero_ms:.0f}ms{C.RST}",
-            f"  {C.BOLD}DEPTH{C.RST}  {C.CYAN}BID {bbo['bid_size']:.4f}{C.RST}"
-            f"   {C.PURPLE}ASK {bbo['ask_size']:.4f}{C.RST}"
-            f"    {C.BOLD}SIZE{C.RST}  {size_text}"
-            f"    {C.BOLD}NEXT{C.RST}  {dir_text}",
-            BAR,
-            # ── 账户 ──
-            f"  {C.BOLD}{C.CYAN}L{C.RST}"
-            f"  ${self.account_a.current_balance:>8.2f}"
-            f"  {C.pnl(pnl_a)}"
-            f"  {C.bar(min_a, MAX_ORDERS_PER_MINUTE, 6)} {min_a:>2}/{MAX_ORDERS_PER_MINUTE}m"
-            f"  {C.bar(half_a, MAX_ORDERS_PER_HALF_HOUR, 6)} {half_a:>3}/{MAX_ORDERS_PER_HALF_HOUR}h"
-            f"  {C.bar(day_a, MAX_ORDERS_PER_DAY, 6)} {day_a:>4}/{MAX_ORDERS_PER_DAY}d",
-            f"  {C.BOLD}{C.PURPLE}S{C.RST}"
-            f"  ${self.account_b.current_balance:>8.2f}"
-            f"  {C.pnl(pnl_b)}"
-            f"  {C.bar(min_b, MAX_ORDERS_PER_MINUTE, 6)} {min_b:>2}/{MAX_ORDERS_PER_MINUTE}m"
-            f"  {C.bar(half_b, MAX_ORDERS_PER_HALF_HOUR, 6)} {half_b:>3}/{MAX_ORDERS_PER_HALF_HOUR}h"
-            f"  {C.bar(day_b, MAX_ORDERS_PER_DAY, 6)} {day_b:>4}/{MAX_ORDERS_PER_DAY}d",
-            BAR,
-            # ── 统计 ──
-            f"  {C.BOLD}CYCLES{C.RST}  {C.BWHITE}{self.cycle_count}{C.RST}/{self.total_max_cycles}"
-            f"   {C.GREEN}✓{self.successful_cycles}{C.RST}"
-            f" {C.RED}✗{self.failed_cycles}{C.RST}"
-            f"   {C.BOLD}BURST{C.RST} {self.burst_rounds}"
-            f"    {C.BOLD}PnL{C.RST}  {C.pnl(pnl_total)} U",
-            f"  {C.BOLD}VOL{C.RST}  ${stats['volume'] / 1000:.1f}K"
-            f"   {C.BOLD}PER10K{C.RST}  {C.pnl(stats['per_10k'])}"
-            f"    {C.BOLD}WS{C.RST} {ws_age:.0f}ms"
-            f"   {C.BOLD}LAT{C.RST} [{self.latency_tracker.format_recent()}]"
-            f"   {C.DIM}{time_text}{C.RST}",
-            BAR,
-        ]
+            size_text = f"{C.BCYAN}{size}{C.RST}" if size > 0 else f"{C.DIM}--{C.RST}"
+
+        # 分隔线行 (0/2/5/8/11) 在 __init__ 中一次写好, 这里只覆盖内容行
+        lines = self._display_lines
+        header_key = (state, obs.mode, group_name)
+        if header_key != self._header_key:
+            self._header_key = header_key
+            lines[1] = (f"  {C.BOLD}{C.BWHITE}PARADEX DUAL HEDGE{C.RST}"
+                        f"  {C.state_badge(state.name)}"
+                        f"  {C.mode_badge(obs.mode)}"
+                        f"  {C.DIM}{MARKET}{C.RST}"
+                        f"  {C.BOLD}GRP{C.RST} {C.BWHITE}{group_name}{C.RST}/{len(self.groups)}")
+        # ── 行情 ──
+        lines[3] = (f"  {C.BOLD}PRICE{C.RST}  {C.BWHITE}${format(bbo.mid_price, ',.2f')}{C.RST}"
+                    f"    {C.BOLD}SPREAD{C.RST}  {C.spread_color(obs.spread_pct(), ZERO_SPREAD_THRESHOLD)}"
+                    f"    {C.BOLD}0-GAP{C.RST}  {zero_color}{zero_ms}ms{C.RST}")
+        lines[4] = (f"  {C.BOLD}DEPTH{C.RST}  {C.CYAN}BID {bbo.bid_size:.4f}{C.RST}"
+                    f"   {C.PURPLE}ASK {bbo.ask_size:.4f}{C.RST}"
+                    f"    {C.BOLD}SIZE{C.RST}  {size_text}"
+                    f"    {C.BOLD}NEXT{C.RST}  {dir_text}")
+        # ── 账户 ──
+        lines[6] = (f"  {C.BOLD}{C.CYAN}L{C.RST}"
+                    f"  ${acc_a.current_balance:>8.2f}"
+                    f"  {C.pnl(pnl_a)}"
+                    f"  {C.bar(min_a, MAX_ORDERS_PER_MINUTE, 6)} {min_a:>2}/{MAX_ORDERS_PER_MINUTE}m"
+                    f"  {C.bar(half_a, MAX_ORDERS_PER_HALF_HOUR, 6)} {half_a:>3}/{MAX_ORDERS_PER_HALF_HOUR}h"
+                    f"  {C.bar(day_a, MAX_ORDERS_PER_DAY, 6)} {day_a:>4}/{MAX_ORDERS_PER_DAY}d")
+        lines[7] = (f"  {C.BOLD}{C.PURPLE}S{C.RST}"
+                    f"  ${acc_b.current_balance:>8.2f}"
+                    f"  {C.pnl(pnl_b)}"
+                    f"  {C.bar(min_b, MAX_ORDERS_PER_MINUTE, 6)} {min_b:>2}/{MAX_ORDERS_PER_MINUTE}m"
+                    f"  {C.bar(half_b, MAX_ORDERS_PER_HALF_HOUR, 6)} {half_b:>3}/{MAX_ORDERS_PER_HALF_HOUR}h"
+                    f"  {C.bar(day_b, MAX_ORDERS_PER_DAY, 6)} {day_b:>4}/{MAX_ORDERS_PER_DAY}d")
+        # ── 统计 ──
+        lines[9] = (f"  {C.BOLD}CYCLES{C.RST}  {C.BWHITE}{cycle_count}{C.RST}/{self.total_max_cycles}"
+                    f"   {C.GREEN}✓{self.successful_cycles}{C.RST}"
+                    f" {C.RED}✗{self.failed_cycles}{C.RST}"
+                    f"   {C.BOLD}BURST{C.RST} {self.burst_rounds}"
+                    f"    {C.BOLD}PnL{C.RST}  {C.pnl(pnl_total)} U")
+        lines[10] = (f"  {C.BOLD}VOL{C.RST}  ${stats['volume'] / 1000:.1f}K"
+                     f"   {C.BOLD}PER10K{C.RST}  {C.pnl(stats['per_10k'])}"
+                     f"    {C.BOLD}WS{C.RST} {ws_ms}ms"
+                     f"   {C.BOLD}LAT{C.RST} [{self.latency_tracker.format_recent()}]"
+                     f"   {C.DIM}{time_text}{C.RST}")
 
         self.panel.update(lines)
 
     def _update_display_waiting(self, wait_seconds: float):
         """Show a waiting panel when all groups are rate-limited."""
-        W = 74
-        BAR = f"{C.BCYAN}{'━' * W}{C.RST}"
+        BAR = self.PANEL_BAR
+        self._display_sig = None    # 等待面板覆盖了主面板, 恢复后需完整重绘
         mins = wait_seconds / 60
 
+        # 所有账户的计数一次取完, 可用性由计数直接判定 (不再逐组 can_trade)
+        persistence = self.persistence
+        counts = persistence.get_counts_bulk(
+            [addr for g in self.groups for addr in (g["l2_address_long"], g["l2_address_short"])])
         lines_info = []
         for g in self.groups:
-            m_l, h_l, d_l = self.persistence.get_counts(g["l2_address_long"])
-            m_s, h_s, d_s = self.persistence.get_counts(g["l2_address_short"])
-            avail = f"{C.BGREEN}✅{C.RST}" if self._group_available(g) else f"{C.BRED}⛔{C.RST}"
+            c_l, c_s = counts[g["l2_address_long"]], counts[g["l2_address_short"]]
+            m_l, h_l, d_l = c_l
+            m_s, h_s, d_s = c_s
+            ok = persistence.counts_ok(c_l) and persistence.counts_ok(c_s)
+            avail = f"{C.BGREEN}✅{C.RST}" if ok else f"{C.BRED}⛔{C.RST}"
             lines_info.append(
                 f"  {avail} {C.BOLD}{g['name']}{C.RST}"
                 f"  L:{m_l}m/{h_l}h/{d_l}d"
@@ -1751,16 +2620,7 @@ class DualAccountController:
             BAR,
             f"  {C.BOLD}WAIT{C.RST}  {C.BYELLOW}{mins:.1f}m{C.RST} remaining",
             BAR,
-        ] + lines_info + [
-            BAR,
-            "",  # padding
-            "",
-            "",
-            "",
-            "",
-            "",
-            BAR,
-        ]
+        ] + lines_info + [BAR, *self.WAITING_PAD, BAR]
 
         # Trim to PANEL_LINES
         lines = lines[:self.panel.PANEL_LINES]
@@ -1771,15 +2631,23 @@ class DualAccountController:
     async def shutdown(self):
         """Graceful shutdown: final stats, TG report, cleanup."""
         self.running = False
+        self._display_dirty.set()   # 唤醒 _display_loop 让其退出
+        self.panel.close()          # 面板剩余帧先写完, 再打印最终统计
 
-        # 关闭 BBO 数据记录器 (刷出剩余缓冲)
+        # 关闭 BBO 数据记录器 (刷出剩余缓冲); 速率日志并入快照
         self.observer.recorder.close()
+        self.persistence.close()
         if self.observer.recorder.total_records > 0:
             print(f"📝 BBO 数据已保存: {self.observer.recorder.total_records} 条 → {BBO_RECORD_DIR}/")
 
-        # 最终余额
+        # 最终余额与关闭 WebSocket 互不依赖, 并行进行且整体限时, 断网时也不会卡住退出
+        ws_src = self.ws_account or self.account_a
         try:
-            await self._update_balances()
+            await asyncio.wait_for(asyncio.gather(
+                self._final_balances(),
+                ws_src.paradex.ws_client.close(),
+                return_exceptions=True,
+            ), SHUTDOWN_STEP_TIMEOUT_SEC)
         except Exception:
             pass
 
@@ -1787,51 +2655,62 @@ class DualAccountController:
         stats = self.pnl_tracker.get_stats(self.account_a, self.account_b)
         latency = self.latency_tracker.get_stats()
 
-        print("\n" * 2)
-        print("=" * 72)
-        print(f"📊 双账户对冲策略 - 最终统计 (组 {self.current_group_name})")
-        print("=" * 72)
-        print(f"   循环: {self.cycle_count} "
-              f"(成功: {self.successful_cycles}, 失败: {self.failed_cycles})")
-        print(f"   运行: {elapsed / 60:.1f} 分钟")
-        print("-" * 72)
-        print(f"  做多账户 ({self.account_a.name}):")
-        print(f"   初始: ${self.account_a.initial_balance:.4f} → "
-              f"当前: ${self.account_a.current_balance:.4f}")
-        print(f"   盈亏: ${self.account_a.get_pnl():+.4f} USDC | "
-              f"下单: {self.account_a.order_count} 单")
-        print(f"  做空账户 ({self.account_b.name}):")
-        print(f"   初始: ${self.account_b.initial_balance:.4f} → "
-              f"当前: ${self.account_b.current_balance:.4f}")
-        print(f"   盈亏: ${self.account_b.get_pnl():+.4f} USDC | "
-              f"下单: {self.account_b.order_count} 单")
-        print("-" * 72)
-        print(f"💵 合计盈亏: ${stats['pnl_total']:+.4f} USDC")
-        print(f"📈 总交易量: ${stats['volume']:,.2f} USD")
+        # 最终统计整块拼好后一次写出 (一次 write, 不与其他输出交错)
+        acc_a, acc_b = self.account_a, self.account_b
+        heavy, light = "=" * 72, "-" * 72
+        out = [
+            "\n" * 2,
+            heavy,
+            f"📊 双账户对冲策略 - 最终统计 (组 {self.current_group_name})",
+            heavy,
+            f"   循环: {self.cycle_count} "
+            f"(成功: {self.successful_cycles}, 失败: {self.failed_cycles})",
+            f"   运行: {elapsed / 60:.1f} 分钟",
+            light,
+            f"  做多账户 ({acc_a.name}):",
+            f"   初始: ${acc_a.initial_balance:.4f} → 当前: ${acc_a.current_balance:.4f}",
+            f"   盈亏: ${acc_a.get_pnl():+.4f} USDC | 下单: {acc_a.order_count} 单",
+            f"  做空账户 ({acc_b.name}):",
+            f"   初始: ${acc_b.initial_balance:.4f} → 当前: ${acc_b.current_balance:.4f}",
+            f"   盈亏: ${acc_b.get_pnl():+.4f} USDC | 下单: {acc_b.order_count} 单",
+            light,
+            f"💵 合计盈亏: ${stats['pnl_total']:+.4f} USDC",
+            f"📈 总交易量: ${stats['volume']:,.2f} USD",
+        ]
         if stats['volume'] > 0:
-            print(f"📊 每万成交: ${stats['per_10k']:.4f}")
-        print("-" * 72)
+            out.append(f"📊 每万成交: ${stats['per_10k']:.4f}")
+        out.append(light)
         if latency["recent"]:
-            print(f"⏱️  延迟: 平均 {latency['avg']:.0f}ms | "
-                  f"最小 {latency['min']:.0f}ms | 最大 {latency['max']:.0f}ms")
-        print("=" * 72)
-
-        # TG: 最终报告
-        await self.tg.notify_shutdown(
-            self.cycle_count, stats,
-            self.account_a, self.account_b,
-            elapsed / 60,
-        )
+            out.append(f"⏱️  延迟: 平均 {latency['avg']:.0f}ms | "
+                       f"最小 {latency['min']:.0f}ms | 最大 {latency['max']:.0f}ms")
+        out.append(heavy)
+        sys.stdout.write("\n".join(out) + "\n")
+        sys.stdout.flush()
 
-        # 关闭 WebSocket
+        # TG: 最终报告 (需要最终余额, 所以在上一阶段之后; 立即发出队列中剩余消息)
         try:
-            ws_src = self.ws_account or self.account_a
-            await ws_src.paradex.ws_client.close()
+            await asyncio.wait_for(self._final_report(stats, elapsed), SHUTDOWN_STEP_TIMEOUT_SEC)
         except Exception:
             pass
 
         print("👋 已退出")
 
+    async def _final_balances(self):
+        """Wait (bounded) for any in-flight background refresh, then take one clean balance read."""
+        task = self._balance_task
+        if task is not None and not task.done():
+            # asyncio.wait 超时不取消任务也不抛异常; 后台任务自身已吞掉异常
+            await asyncio.wait((task,), timeout=BALANCE_DRAIN_TIMEOUT_SEC)
+        await self._update_balances()
+
+    async def _final_report(self, stats: dict, elapsed: float):
+        await self.tg.notify_shutdown(
+            self.cycle_count, stats,
+            self.account_a, self.account_b,
+            elapsed / 60,
+        )
+        await self.tg.close()
+
 
 # ─── Coin Selection ───
 
@@ -1848,20 +2727,18 @@ def select_coin() -> str:
                 print(f"❌ 无效币种: {coin}，可选: {', '.join(COIN_PRESETS.keys())}")
                 sys.exit(1)
 
-    # 交互式菜单
+    # 交互式菜单 (整块拼好一次写出)
     coins = list(COIN_PRESETS.keys())
     BAR = f"{C.BCYAN}{'━' * 56}{C.RST}"
-    print()
-    print(BAR)
-    print(f"  {C.BOLD}{C.BWHITE}PARADEX DUAL HEDGE{C.RST}  {C.DIM}Select Trading Pair{C.RST}")
-    print(BAR)
+    menu = ["", BAR, f"  {C.BOLD}{C.BWHITE}PARADEX DUAL HEDGE{C.RST}  {C.DIM}Select Trading Pair{C.RST}", BAR]
     for i, coin in enumerate(coins, 1):
         preset = COIN_PRESETS[coin]
-        print(f"  {C.BOLD}{C.BWHITE}[{i}]{C.RST}"
-              f"  {C.BCYAN}{coin:<4}{C.RST}"
-              f"  {C.DIM}→{C.RST}  {preset['market']:<18}"
-              f"  {C.DIM}size:{C.RST} {preset['order_size']}")
-    print(BAR)
+        menu.append(f"  {C.BOLD}{C.BWHITE}[{i}]{C.RST}"
+                    f"  {C.BCYAN}{coin:<4}{C.RST}"
+                    f"  {C.DIM}→{C.RST}  {preset['market']:<18}"
+                    f"  {C.DIM}size:{C.RST} {preset['order_size']}")
+    menu.append(BAR)
+    sys.stdout.write("\n".join(menu) + "\n")
 
     while True:
         try:
@@ -1885,17 +2762,18 @@ def select_coin() -> str:
 
 
 def apply_coin_preset(coin: str):
-    """Override runtime globals with the selected coin's preset."""
-    global MARKET, ORDER_SIZE, MIN_ORDER_SIZE, SIZE_DECIMALS
+    """Select the coin in config and rebind the derived runtime globals."""
+    global MARKET, ORDER_SIZE, MIN_ORDER_SIZE, SIZE_QUANT
     global BURST_MIN_DEPTH, COIN_SYMBOL
 
-    preset = COIN_PRESETS[coin]
+    config.set_coin(coin)
     COIN_SYMBOL = coin
-    MARKET = preset["market"]
-    ORDER_SIZE = preset["order_size"]
-    MIN_ORDER_SIZE = preset["min_order_size"]
-    SIZE_DECIMALS = preset["size_decimals"]
-    BURST_MIN_DEPTH = preset["burst_min_depth"]
+    MARKET = config.MARKET
+    ORDER_SIZE = config.ORDER_SIZE
+    MIN_ORDER_SIZE = config.MIN_ORDER_SIZE
+    SIZE_QUANT = config.SIZE_QUANT
+    BURST_MIN_DEPTH = config.BURST_MIN_DEPTH
+    _DEC_CACHE.clear()   # 精度随币种变化
 
 
 # ─── Entry Point ───
@@ -1906,6 +2784,13 @@ async def main():
 
 
 if __name__ == "__main__":
+    # uvloop: libuv 事件循环, 降低回调调度开销 (未安装 / Windows 时回退默认循环)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     try:
         # 1. 选择币种
         selected_coin = select_coin()
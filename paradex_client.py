@@ -8,10 +8,13 @@ from paradex_py.environment import Environment
 from paradex_py.common.order import Order, OrderType, OrderSide
 
 from config import (
-    PARADEX_ENV, L2_ADDRESS, L2_PRIVATE_KEY,
-    MARKET, ORDER_SIZE_BTC
+    PARADEX_ENV, ACCOUNT_GROUPS,
+    MARKET, ORDER_SIZE, SIZE_QUANT, group_private_key
 )
 
+# 单账户客户端: 取第一组的做多账户 (唯一配置源 config.py)
+L2_ADDRESS = ACCOUNT_GROUPS[0]["l2_address_long"]
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,7 +47,7 @@ class ParadexClient:
             # 注意: 设置 auto_auth=False，我们手动调用带 token_usage 参数的 auth
             self.paradex = ParadexSubkey(
                 env=env,
-                l2_private_key=L2_PRIVATE_KEY,
+                l2_private_key=group_private_key(ACCOUNT_GROUPS[0], "long"),
                 l2_address=L2_ADDRESS
             )
             
@@ -175,7 +178,7 @@ class ParadexClient:
             logger.error(f"获取 BBO 失败: {e}")
             raise
     
-    def place_market_order(self, side: str, size: float = ORDER_SIZE_BTC) -> Dict[str, Any]:
+    def place_market_order(self, side: str, size: float = ORDER_SIZE) -> Dict[str, Any]:
         """下市价单
         
         Args:
@@ -195,7 +198,7 @@ class ParadexClient:
                 market=MARKET,
                 order_type=OrderType.Market,
                 order_side=order_side,
-                size=Decimal(str(size)),
+                size=Decimal(str(size)).quantize(SIZE_QUANT),
             )
             
             response = self.paradex.api_client.submit_order(order=order)
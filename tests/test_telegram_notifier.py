@@ -0,0 +1,66 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+ds = None
+_old_cwd = None
+_tmp = None
+
+
+def setUpModule():
+    # dual_scalper 导入时会在当前目录创建日志文件, 放到临时目录避免污染仓库
+    global ds, _old_cwd, _tmp
+    _old_cwd = os.getcwd()
+    _tmp = tempfile.TemporaryDirectory()
+    os.chdir(_tmp.name)
+    try:
+        import dual_scalper
+    except ImportError as e:   # paradex_py / httpx 未安装
+        os.chdir(_old_cwd)
+        raise unittest.SkipTest(f"依赖未安装: {e}")
+    ds = dual_scalper
+
+
+def tearDownModule():
+    if _old_cwd is not None:
+        os.chdir(_old_cwd)
+    if _tmp is not None:
+        _tmp.cleanup()
+
+
+class TelegramFlushTest(unittest.TestCase):
+    """Messages queued while a batch is being posted must still be sent."""
+
+    def _run(self):
+        async def scenario():
+            tg = ds.TelegramNotifier("token", "chat", enabled=True, batch_window=0.01)
+            posted = []
+            posting = asyncio.Event()
+
+            async def slow_post(text):
+                posting.set()
+                await asyncio.sleep(0.05)
+                posted.append(text)
+
+            tg._post_message = slow_post
+            await tg.send("first")
+            await posting.wait()
+            # 第一批还在发送中: 普通消息 + 两条同 key 的防抖消息
+            await tg.send("second")
+            tg.send_template("progress {n}", {"n": 1}, key="progress")
+            tg.send_template("progress {n}", {"n": 2}, key="progress")
+            await asyncio.wait_for(tg._flush_task, 1.0)
+            return tg, posted
+
+        return asyncio.run(scenario())
+
+    def test_send_during_slow_post_is_flushed(self):
+        tg, posted = self._run()
+        self.assertEqual(posted, ["first", "second\n\nprogress 2"])
+        self.assertEqual(tg._pending, [])
+        self.assertEqual(tg._pending_keys, {})
+
+
+if __name__ == "__main__":
+    unittest.main()